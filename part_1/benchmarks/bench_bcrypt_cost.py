@@ -0,0 +1,42 @@
+"""
+час хешування bcrypt при різних cost на поточній машині - для вибору
+bcrypt_rounds (орієнтир: 100-300 мс на хеш для одного потоку)
+
+запуск з part_1: python -m benchmarks.bench_bcrypt_cost [min_rounds] [max_rounds]
+"""
+import sys
+import time
+
+from passlib.hash import bcrypt
+
+from src.configuration.config import settings
+
+PASSWORD = "correct horse battery staple"
+REPEATS = 3
+
+
+def bench(rounds: int) -> float:
+    hasher = bcrypt.using(rounds=rounds)
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        hasher.hash(PASSWORD)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    min_rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    max_rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 14
+    print(f"current bcrypt_rounds = {settings.bcrypt_rounds}, bcrypt_pool_size = {settings.bcrypt_pool_size}")
+    for rounds in range(min_rounds, max_rounds + 1):
+        elapsed = bench(rounds)
+        marker = "  <- current" if rounds == settings.bcrypt_rounds else ""
+        print(
+            f"rounds {rounds:>2} {elapsed * 1000:>9.1f} ms/hash "
+            f"{settings.bcrypt_pool_size / elapsed:>8.1f} logins/s per worker{marker}"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+вартість серіалізації 1000 контактів (ORM Contact -> JSON): як раніше
+(ContactSchema по одному + jsonable_encoder + json.dumps), як FastAPI
+з response_model та JSONResponse / ORJSONResponse, та TypeAdapter
+(serialize_contacts)
+
+запуск з part_1: python -m benchmarks.bench_contact_serialization
+"""
+import json
+import time
+from datetime import date, timedelta
+from typing import List
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from src.database.models import Contact
+from src.routes.contact import serialize_contacts
+from src.schemas.schemas import ContactSchema, ContactResponse, ContactListAdapter
+
+CONTACTS = 1000
+ROUNDS = 50
+
+
+def make_contacts() -> List[Contact]:
+    return [
+        Contact(
+            id=i,
+            first_name=f"First{i}",
+            last_name=f"Last{i}",
+            email=f"contact{i}@example.com",
+            phone_number=f"+38050{i:07d}",
+            birthday=date(1990, 1, 1) + timedelta(days=i),
+            additional_info=None if i % 2 else f"note {i}",
+            user_id=1
+        )
+        for i in range(1, CONTACTS + 1)
+    ]
+
+
+def before(contacts: List[Contact]) -> bytes:
+    return json.dumps(jsonable_encoder([
+        ContactSchema.model_validate(contact, from_attributes=True)
+        for contact in contacts
+    ])).encode("utf-8")
+
+
+def response_model(response_class, contacts: List[Contact]) -> bytes:
+    # приблизно те, що робить FastAPI для response_model=List[...]
+    content = jsonable_encoder(ContactListAdapter.validate_python(contacts, from_attributes=True))
+    return response_class(content).body
+
+
+def bench(label: str, func, contacts: List[Contact], baseline: float = None) -> float:
+    func(contacts)
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        func(contacts)
+    elapsed = (time.perf_counter() - start) / ROUNDS
+    speedup = f"{baseline / elapsed:>6.1f}x" if baseline else ""
+    print(f"{label:<16} {elapsed * 1000:>8.2f} ms per {CONTACTS} contacts {speedup}")
+    return elapsed
+
+
+def main():
+    contacts = make_contacts()
+    baseline = bench("before", before, contacts)
+    bench("JSONResponse", lambda c: response_model(JSONResponse, c), contacts, baseline)
+    bench("ORJSONResponse", lambda c: response_model(ORJSONResponse, c), contacts, baseline)
+    bench("TypeAdapter", serialize_contacts, contacts, baseline)
+    assert json.loads(serialize_contacts(contacts))[0] == ContactResponse.model_validate(contacts[0]).model_dump(mode="json")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""
+листів за секунду при рендері шаблонів: як fastapi_mail (нове Environment
+та розбір шаблону на кожен лист), скомпільований шаблон Jinja, статичні
+частини (EmailTemplates.render) та масовий рендер в пулі потоків
+
+запуск з part_1: python -m benchmarks.bench_email_templates
+"""
+import asyncio
+import time
+
+from jinja2 import Environment, FileSystemLoader
+
+from src.services.email_templates import TEMPLATE_FOLDER, email_templates
+
+MESSAGES = 20000
+TEMPLATE = "email_verification_template.html"
+
+
+def context(i: int) -> dict:
+    return {"host": "http://localhost:8000/", "username": f"user{i}", "token": f"token-{i:08d}"}
+
+
+def report(label: str, elapsed: float) -> None:
+    print(f"{label:<12} {MESSAGES / elapsed:>12,.0f} messages/s {elapsed / MESSAGES * 1e6:>8.1f} us/message")
+
+
+def bench(label: str, render) -> float:
+    start = time.perf_counter()
+    for i in range(MESSAGES):
+        render(context(i))
+    elapsed = time.perf_counter() - start
+    report(label, elapsed)
+    return elapsed
+
+
+def main():
+    bench(
+        "per-message",
+        lambda ctx: Environment(loader=FileSystemLoader(TEMPLATE_FOLDER)).get_template(TEMPLATE).render(**ctx)
+    )
+    compiled = email_templates.templates[TEMPLATE]
+    bench("compiled", lambda ctx: compiled.render(**ctx))
+    bench("static", lambda ctx: email_templates.render(TEMPLATE, ctx))
+
+    items = [(TEMPLATE, context(i)) for i in range(MESSAGES)]
+    start = time.perf_counter()
+    asyncio.run(email_templates.render_bulk(items))
+    report("bulk", time.perf_counter() - start)
+    email_templates.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+"""
+пропускна здатність перевірки access токена: jwt.decode на кожен запит
+проти кешу перевірених claims (Auth.decode_access_token)
+
+запуск з part_1: python -m benchmarks.bench_token_cache
+"""
+import asyncio
+import time
+
+from jose import jwt
+
+from src.configuration.config import settings
+from src.services.auth import auth_service
+
+ITERATIONS = 20000
+
+
+def bench(label, func):
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<10} {ITERATIONS / elapsed:>12,.0f} tokens/s {elapsed / ITERATIONS * 1e6:>8.2f} us/token")
+    return elapsed
+
+
+def main():
+    token = asyncio.run(auth_service.create_access_token({"sub": "bench@example.com"}))
+    uncached = bench(
+        "uncached",
+        lambda: jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+    )
+    auth_service.decode_access_token(token)
+    cached = bench("cached", lambda: auth_service.decode_access_token(token))
+    print(f"speedup    {uncached / cached:>12.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,15 +1,52 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
 import uvicorn
 from fastapi import FastAPI, HTTPException, Depends, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
+from fastapi.staticfiles import StaticFiles
 from sqlalchemy import text
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 
 from src.routes import contact, auth, users
-from src.database.db import get_db
+from src.database.db import get_async_db, db_pool_stats
+from src.database.redis_pool import init_redis, close_redis, redis_pool_stats
+from src.database.routing import replica_router
+from src.configuration.config import settings
+from src.services.auth import auth_service
+from src.services.avatar import avatar_service
+from src.services.metrics import MetricsMiddleware, metrics_endpoint, mark_process_dead
+from src.services.sql_stats import SQLStatsMiddleware
+from src.services.rate_limiter import RateLimitHeadersMiddleware
+from src.services.user_cache import user_cache
+
+logger = logging.getLogger(__name__)
+
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # спільний пул з'єднань Redis для всіх сервісів процесу
+    init_redis()
+    # інвалідація локального кешу користувачів між воркерами
+    user_cache_listener = asyncio.create_task(user_cache.listen())
+    # перевірка доступності реплік для читання
+    replica_monitor = asyncio.create_task(replica_router.monitor()) if replica_router.engines else None
+    yield
+    user_cache_listener.cancel()
+    if replica_monitor is not None:
+        replica_monitor.cancel()
+    await replica_router.dispose()
+    await close_redis()
+    auth_service.password_hasher.shutdown()
+    avatar_service.shutdown()
+    mark_process_dead()
 
-app = FastAPI()
+
+# orjson для всіх відповідей, що серіалізуються FastAPI (response_model)
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
 # origins = ["*"]
 origins = ["http://localhost:8000"]
@@ -21,11 +58,32 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[
+        "X-Next-Cursor",
+        "ETag",
+        "X-RateLimit-Limit",
+        "X-RateLimit-Remaining",
+        "X-RateLimit-Reset",
+        "Retry-After",
+        "Server-Timing",
+    ],
 )
+app.add_middleware(RateLimitHeadersMiddleware)
+app.add_middleware(SQLStatsMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 app.include_router(contact.router, prefix="/api")
 app.include_router(auth.router, prefix='/api')
 app.include_router(users.router, prefix='')
+app.add_api_route("/metrics", metrics_endpoint, include_in_schema=False)
+
+if settings.avatar_storage == "local":
+    # аватари з LocalStorage (розробка, тести)
+    app.mount(
+        settings.avatar_local_url,
+        StaticFiles(directory=settings.avatar_local_dir, check_dir=False),
+        name="avatars"
+    )
 
 
 @app.get("/", tags=["main"])
@@ -34,19 +92,25 @@ def get_root():
 
 
 @app.get("/healthchecker", tags=["main"])
-def healthchecker(db: Session = Depends(get_db)):
+async def healthchecker(db: AsyncSession = Depends(get_async_db)):
     try:
         # Make request
-        result = db.execute(text("SELECT 1")).fetchone()
+        result = (await db.execute(text("SELECT 1"))).fetchone()
         if result is None:
             raise HTTPException(
                 status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
                 detail="Database is not configured correctly"
             )
-        return {"message": "Welcome to FastAPI!"}
-    except Exception as e:
-        print(e)
-
+        db_pool = db_pool_stats()
+        return {
+            "message": "Welcome to FastAPI!",
+            # saturated - всі з'єднання видані, нові запити чекають до db_pool_timeout
+            "db_pool": {**db_pool, "saturated": db_pool["saturation"] >= 1.0},
+            "redis_pool": redis_pool_stats(),
+            "replicas": replica_router.stats()
+        }
+    except Exception:
+        logger.exception("Healthcheck failed")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error connecting to the database"
@@ -0,0 +1,41 @@
+"""'Contacts birthday day of year'
+
+Revision ID: 347ce8cb57b0
+Revises: 960068c13333
+Create Date: 2026-10-18 12:21:07.905311
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '347ce8cb57b0'
+down_revision: Union[str, None] = '960068c13333'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# день року в високосному році (29 лютого = 60), див. src/services/birthdays.py
+BIRTHDAY_DOY_SQL = (
+    "(make_date(2000, EXTRACT(MONTH FROM birthday)::int, EXTRACT(DAY FROM birthday)::int)"
+    " - DATE '2000-01-01' + 1)::smallint"
+)
+
+
+def upgrade() -> None:
+    op.add_column(
+        'contacts',
+        sa.Column('birthday_doy', sa.SmallInteger(), sa.Computed(BIRTHDAY_DOY_SQL, persisted=True))
+    )
+    op.create_index(
+        'ix_contacts_user_id_birthday_doy',
+        'contacts',
+        ['user_id', 'birthday_doy', 'id']
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_contacts_user_id_birthday_doy', table_name='contacts')
+    op.drop_column('contacts', 'birthday_doy')
@@ -0,0 +1,32 @@
+"""'Contacts keyset pagination indexes'
+
+Revision ID: 812f73c44a2d
+Revises: f4f5d64b1aba
+Create Date: 2026-10-18 10:12:31.402118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '812f73c44a2d'
+down_revision: Union[str, None] = 'f4f5d64b1aba'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_contacts_user_id_id', 'contacts', ['user_id', 'id'])
+    op.create_index(
+        'ix_contacts_user_id_name',
+        'contacts',
+        ['user_id', 'last_name', 'first_name', 'id']
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_contacts_user_id_name', table_name='contacts')
+    op.drop_index('ix_contacts_user_id_id', table_name='contacts')
@@ -0,0 +1,45 @@
+"""'Contacts trigram search indexes'
+
+Revision ID: 960068c13333
+Revises: 812f73c44a2d
+Create Date: 2026-10-18 11:04:52.718640
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '960068c13333'
+down_revision: Union[str, None] = '812f73c44a2d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TRGM_COLUMNS = ('first_name', 'last_name', 'email')
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # btree_gin - щоб user_id був частиною GIN індексу
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gin")
+    for column in TRGM_COLUMNS:
+        op.create_index(
+            f'ix_contacts_{column}_trgm',
+            'contacts',
+            ['user_id', column],
+            postgresql_using='gin',
+            postgresql_ops={column: 'gin_trgm_ops'}
+        )
+    # вираз має збігатися з contact_search_text в src/repository/contacts.py
+    op.execute(
+        "CREATE INDEX ix_contacts_search_trgm ON contacts USING gin "
+        "(user_id, (first_name || ' ' || last_name || ' ' || email) gin_trgm_ops)"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_contacts_search_trgm', table_name='contacts')
+    for column in TRGM_COLUMNS:
+        op.drop_index(f'ix_contacts_{column}_trgm', table_name='contacts')
@@ -1,3 +1,5 @@
+from typing import Dict, List
+
 from pydantic_settings import BaseSettings
 from pathlib import Path
 
@@ -7,7 +9,27 @@ CONFIG_FILE = Path(__file__).parent / '.env'
 class Settings(BaseSettings):
     secret_key: str
     algorithm: str
+    jwt_cache_size: int = 10000
+    jwt_cache_max_ttl: int = 900
+    jwt_revocation_check: bool = False
+    bcrypt_rounds: int = 12
+    bcrypt_pool_size: int = 4
+    bcrypt_max_queue: int = 32
     db_url: str
+    async_db_url: str | None = None
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout: float = 30.0
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+    # pgbouncer в режимі transaction pooling: без підготовлених запитів на сервері
+    db_pgbouncer: bool = False
+    # репліки для читання контактів (JSON список url); порожньо - все йде на primary
+    db_replica_urls: List[str] = []
+    db_replica_health_interval: float = 10.0
+    db_replica_health_timeout: float = 2.0
+    # після змін користувач читає з primary стільки секунд (read-your-writes)
+    db_read_your_writes_window: float = 5.0
     mail_username: str
     mail_from: str
     mail_password: str
@@ -17,12 +39,49 @@ class Settings(BaseSettings):
     mail_ssl_tls: bool
     mail_use_credentials: bool
     mail_validate_certs: bool
+    mail_timeout: float = 30.0
+    email_outbox_batch_size: int = 50
+    email_outbox_poll_interval: float = 2.0
+    email_outbox_lease: int = 300
+    email_outbox_max_attempts: int = 8
+    email_outbox_backoff_base: float = 30.0
+    email_outbox_backoff_max: float = 3600.0
+    email_render_workers: int = 4
+    # порт /metrics воркера листів (без PROMETHEUS_MULTIPROC_DIR); 0 - вимкнено
+    email_worker_metrics_port: int = 9101
     redis_host: str = 'localhost'
     redis_port: int = 6379
+    redis_pool_max_connections: int = 50
+    redis_pool_timeout: float = 5.0
+    redis_socket_timeout: float = 2.0
     redis_cache_timeout: int = 900
+    user_cache_local_size: int = 10000
+    user_cache_local_ttl: int = 300
+    response_cache_enabled: bool = True
+    response_cache_timeout: int = 300
+    birthday_calendar_ttl: int = 90000
+    contacts_import_chunk_size: int = 1000
+    contacts_import_max_errors: int = 1000
+    search_similarity_threshold: float = 0.3
+    sql_slow_query_ms: float = 200.0
+    sql_repeated_query_threshold: int = 5
+    # квоти "кількість/секунди"; маршрути - contacts:list, contacts:read, ...
+    # rate_limit_users (за email) має пріоритет над rate_limit_routes
+    rate_limit_enabled: bool = True
+    rate_limit_default: str = "1/2"
+    rate_limit_routes: Dict[str, str] = {}
+    rate_limit_users: Dict[str, str] = {}
+    rate_limit_local_size: int = 10000
     cloudinary_name: str
     cloudinary_api_key: str
     cloudinary_api_secret: str
+    # сховище аватарів: cloudinary або local (файли в avatar_local_dir)
+    avatar_storage: str = "cloudinary"
+    avatar_local_dir: str = "static/avatars"
+    avatar_local_url: str = "/static/avatars"
+    avatar_size: int = 250
+    avatar_max_bytes: int = 5 * 1024 * 1024
+    avatar_workers: int = 2
 
     class Config:
         env_file = CONFIG_FILE
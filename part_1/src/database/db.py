@@ -1,9 +1,40 @@
+import uuid
+from typing import Dict
+
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncEngine, AsyncSession
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import QueuePool
 
 from src.configuration.config import settings
+from src.services import sql_stats
+from src.services.metrics import instrument_engine
+
+
+def pool_options(url: str) -> dict:
+    """
+    pool_pre_ping перевіряє з'єднання перед видачею (після failover бази),
+    pool_recycle закриває з'єднання, старші за вказану кількість секунд;
+    розмір пулу - лише для QueuePool (SQLite :memory: використовує
+    StaticPool/SingletonThreadPool, які pool_size не приймають)
+    """
+    options = {
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+    db_url = make_url(url)
+    if issubclass(db_url.get_dialect().get_pool_class(db_url), QueuePool):
+        options.update(
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+        )
+    return options
+
 
-engine = create_engine(settings.db_url)
+# синхронний engine - для Alembic та скриптів
+engine = create_engine(settings.db_url, **pool_options(settings.db_url))
 
 # для створення фабрики сесій, яка використовується для створення сесій для взаємодії з базою даних
 # autoflush - це режим, коли будь-які зміни, які ви вносите в об'єкти сесії, автоматично відправляються в базу --> вимкнено
@@ -11,6 +42,101 @@ engine = create_engine(settings.db_url)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
+def to_async_url(db_url: str) -> str:
+    """
+    той самий url з асинхронним драйвером: asyncpg для PostgreSQL, aiosqlite для SQLite
+    """
+    url = make_url(db_url)
+    if url.drivername.startswith("postgresql"):
+        url = url.set(drivername="postgresql+asyncpg")
+    elif url.drivername == "sqlite":
+        url = url.set(drivername="sqlite+aiosqlite")
+    return url.render_as_string(hide_password=False)
+
+
+def get_async_db_url() -> str:
+    """
+    url для асинхронного engine: або явно заданий async_db_url,
+    або db_url з асинхронним драйвером
+    """
+    if settings.async_db_url:
+        return settings.async_db_url
+    return to_async_url(settings.db_url)
+
+
+def async_connect_args(url: str) -> dict:
+    """
+    pgbouncer (transaction pooling) видає різні серверні з'єднання в межах
+    одного клієнтського, тож кеш підготовлених запитів asyncpg вимикається,
+    а імена запитів, які asyncpg все одно готує, робляться унікальними
+    """
+    if not settings.db_pgbouncer or not make_url(url).drivername.endswith("asyncpg"):
+        return {}
+    return {
+        "statement_cache_size": 0,
+        "prepared_statement_cache_size": 0,
+        "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__",
+    }
+
+
+def create_api_engine(url: str, name: str) -> AsyncEngine:
+    """
+    асинхронний engine з налаштуваннями пулу та метриками (primary та репліки)
+    """
+    api_engine = create_async_engine(url, connect_args=async_connect_args(url), **pool_options(url))
+    instrument_engine(api_engine.sync_engine, name)
+    sql_stats.instrument_engine(api_engine.sync_engine)
+    return api_engine
+
+
+instrument_engine(engine, "sync")
+sql_stats.instrument_engine(engine)
+
+# асинхронний engine - для API, запити не блокують event loop
+async_engine = create_api_engine(get_async_db_url(), "api")
+
+
+class RoutingSession(Session):
+    """
+    запити йдуть на engine з info["read_engine"] (репліка, див.
+    src/database/routing.py read_replica), а flush та решта - на primary
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        read_engine = self.info.get("read_engine")
+        if read_engine is not None and not self._flushing:
+            return read_engine
+        return super().get_bind(mapper, clause=clause, **kw)
+
+
+# expire_on_commit=False - після commit() атрибути об'єктів лишаються доступними
+# без додаткового (неявного) запиту до бази, який в async режимі неможливий
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    sync_session_class=RoutingSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+
+def db_pool_stats() -> Dict[str, float]:
+    """
+    стан пулу API engine; saturation - частка виданих з'єднань від максимуму
+    (pool_size + max_overflow)
+    """
+    pool = async_engine.sync_engine.pool
+    checked_out = pool.checkedout()
+    capacity = settings.db_pool_size + settings.db_max_overflow
+    return {
+        "size": pool.size(),
+        "checked_out": checked_out,
+        "overflow": max(pool.overflow(), 0),
+        "max_connections": capacity,
+        "saturation": round(checked_out / capacity, 3) if capacity else 1.0,
+    }
+
+
 # це залежність, яка повертає сесію з використанням фабрики SessionLocal
 def get_db():
     db = SessionLocal()
@@ -18,3 +144,9 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# асинхронна залежність, яка повертає сесію з використанням фабрики AsyncSessionLocal
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
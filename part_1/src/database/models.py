@@ -1,9 +1,11 @@
-from sqlalchemy import Column, Integer, String, Date, Text, func
+from sqlalchemy import Column, Integer, SmallInteger, String, Date, Text, Index, Computed, JSON, func
 from sqlalchemy.sql.sqltypes import DateTime, Boolean
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql.schema import ForeignKey
 
+from src.services.birthdays import BIRTHDAY_DOY_SQL
+
 
 Base = declarative_base()
 
@@ -16,11 +18,36 @@ class Contact(Base):
     email = Column("email", String(100), nullable=False, unique=True)
     phone_number = Column("phone_number", String(20), nullable=False)
     birthday = Column("birthday", Date, nullable=False)
+    # день року дня народження (1..366, 29 лютого = 60), обчислюється базою
+    birthday_doy = Column("birthday_doy", SmallInteger, Computed(BIRTHDAY_DOY_SQL, persisted=True))
     additional_info = Column(Text)  # необов'язкове поле
     created_at = Column('created_at', DateTime, default=func.now())
     user_id = Column('user_id', ForeignKey('users.id', ondelete='CASCADE'), default=None)
     user = relationship('User', backref="tags")
 
+    __table_args__ = (
+        # keyset пагінація списку контактів
+        Index('ix_contacts_user_id_id', 'user_id', 'id'),
+        # найближчі дні народження: діапазон по дню року вже впорядкований за (день, id)
+        Index('ix_contacts_user_id_birthday_doy', 'user_id', 'birthday_doy', 'id'),
+        # keyset пагінація результатів пошуку
+        Index('ix_contacts_user_id_name', 'user_id', 'last_name', 'first_name', 'id'),
+        # пошук підрядка (ilike '%x%') та нечіткий пошук, потребує pg_trgm та btree_gin;
+        # індекс по виразу для пошуку q= створюється в міграції 960068c13333
+        Index(
+            'ix_contacts_first_name_trgm', 'user_id', 'first_name',
+            postgresql_using='gin', postgresql_ops={'first_name': 'gin_trgm_ops'}
+        ),
+        Index(
+            'ix_contacts_last_name_trgm', 'user_id', 'last_name',
+            postgresql_using='gin', postgresql_ops={'last_name': 'gin_trgm_ops'}
+        ),
+        Index(
+            'ix_contacts_email_trgm', 'user_id', 'email',
+            postgresql_using='gin', postgresql_ops={'email': 'gin_trgm_ops'}
+        ),
+    )
+
     def __repr__(self):
         return f"<Contact(name={self.first_name} {self.last_name}, "\
                 "email={self.email}, phone={self.phone_number}, "\
@@ -37,3 +64,34 @@ class User(Base):
     avatar = Column(String(255), nullable=True)
     refresh_token = Column(String(255), nullable=True)
     confirmed = Column(Boolean, nullable=False, default=False)
+
+
+class EmailOutbox(Base):
+    """
+    черга листів: маршрути лише додають запис, надсилає окремий процес
+    python -m src.services.email_worker
+    """
+    __tablename__ = "email_outbox"
+    PENDING = "pending"
+    SENT = "sent"
+    FAILED = "failed"
+
+    id = Column(Integer, primary_key=True)
+    recipient = Column(String(250), nullable=False)
+    subject = Column(String(255), nullable=False)
+    template_name = Column(String(100), nullable=False)
+    template_body = Column(JSON, nullable=False)
+    status = Column(String(20), nullable=False, default=PENDING)
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False, default=func.now())
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=func.now())
+    sent_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # вибірка воркером лише листів, що очікують надсилання
+        Index(
+            'ix_email_outbox_pending', 'next_attempt_at',
+            postgresql_where=(status == PENDING)
+        ),
+    )
@@ -0,0 +1,96 @@
+import time
+from typing import Dict, Optional
+
+import redis.asyncio as redis
+from redis.asyncio.client import Pipeline
+
+from src.configuration.config import settings
+from src.services.metrics import observe_redis
+
+# один пул з'єднань на процес для всіх клієнтів Redis: кеш користувачів,
+# кеш відповідей, календар днів народження, обмеження запитів
+_client: Optional[redis.Redis] = None
+
+
+class InstrumentedPipeline(Pipeline):
+
+    async def execute(self, raise_on_error: bool = True):
+        started = time.perf_counter()
+        try:
+            return await super().execute(raise_on_error)
+        finally:
+            observe_redis("PIPELINE", started)
+
+
+class InstrumentedRedis(redis.Redis):
+    """
+    клієнт з метрикою тривалості команд (redis_command_duration_seconds)
+    """
+
+    async def execute_command(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            return await super().execute_command(*args, **options)
+        finally:
+            observe_redis(str(args[0]).upper(), started)
+
+    def pipeline(self, transaction: bool = True, shard_hint: Optional[str] = None) -> Pipeline:
+        return InstrumentedPipeline(
+            self.connection_pool, self.response_callbacks, transaction, shard_hint
+        )
+
+
+def create_redis_pool() -> redis.BlockingConnectionPool:
+    """
+    пул очікує вільне з'єднання до redis_pool_timeout секунд,
+    а не відкриває нові понад redis_pool_max_connections
+    """
+    return redis.BlockingConnectionPool(
+        host=settings.redis_host,
+        port=settings.redis_port,
+        db=0,
+        max_connections=settings.redis_pool_max_connections,
+        timeout=settings.redis_pool_timeout,
+        socket_timeout=settings.redis_socket_timeout,
+        socket_connect_timeout=settings.redis_socket_timeout,
+        health_check_interval=30
+    )
+
+
+def init_redis(client: Optional[redis.Redis] = None) -> redis.Redis:
+    """
+    створює спільний клієнт (викликається в lifespan застосунку);
+    в тестах можна передати власний клієнт, наприклад fakeredis.aioredis.FakeRedis
+    """
+    global _client
+    _client = client if client is not None else InstrumentedRedis(connection_pool=create_redis_pool())
+    return _client
+
+
+def get_redis() -> redis.Redis:
+    # скрипти та фонові задачі можуть працювати без lifespan - клієнт створюється при першому зверненні
+    if _client is None:
+        return init_redis()
+    return _client
+
+
+async def close_redis() -> None:
+    global _client
+    if _client is not None:
+        if hasattr(_client, "aclose"):
+            await _client.aclose()
+        else:
+            await _client.close()
+        await _client.connection_pool.disconnect()
+        _client = None
+
+
+def redis_pool_stats() -> Dict[str, int]:
+    if _client is None:
+        return {}
+    pool = _client.connection_pool
+    return {
+        "max_connections": pool.max_connections,
+        "in_use": len(getattr(pool, "_in_use_connections", ())),
+        "available": len(getattr(pool, "_available_connections", ())),
+    }
@@ -0,0 +1,137 @@
+import asyncio
+import itertools
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional
+
+import redis.asyncio as redis
+from redis.exceptions import RedisError
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from src.configuration.config import settings
+from src.database.db import create_api_engine, to_async_url
+from src.database.models import User
+from src.database.redis_pool import get_redis
+from src.services.lru_cache import TTLLRUCache
+
+logger = logging.getLogger(__name__)
+
+
+class ReplicaRouter:
+    """
+    репліки для читання: round-robin серед здорових (перевірка SELECT 1
+    кожні db_replica_health_interval секунд); після змін користувача його
+    читання db_read_your_writes_window секунд йдуть на primary - позначка
+    зберігається в Redis для всіх воркерів та локально
+    """
+
+    @property
+    def redis(self) -> redis.Redis:
+        return get_redis()
+
+    def __init__(self, urls: List[str]):
+        self.engines: List[AsyncEngine] = [
+            create_api_engine(to_async_url(url), f"replica{index}")
+            for index, url in enumerate(urls)
+        ]
+        self.healthy: List[bool] = [True] * len(self.engines)
+        self._next = itertools.count()
+        self.recent_writers = TTLLRUCache(10000, settings.db_read_your_writes_window)
+
+    @staticmethod
+    def _sticky_key(user_id: int) -> str:
+        return f"read-your-writes:{user_id}"
+
+    def choose(self) -> Optional[AsyncEngine]:
+        healthy = [engine for engine, ok in zip(self.engines, self.healthy) if ok]
+        if not healthy:
+            return None
+        return healthy[next(self._next) % len(healthy)]
+
+    async def mark_write(self, user_id: int) -> None:
+        if not self.engines:
+            return
+        self.recent_writers.set(user_id, True)
+        try:
+            await self.redis.set(
+                self._sticky_key(user_id), 1, px=int(settings.db_read_your_writes_window * 1000)
+            )
+        except RedisError as err:
+            logger.warning("Read-your-writes mark failed for user %s: %s", user_id, err)
+
+    async def is_sticky(self, user_id: int) -> bool:
+        if self.recent_writers.get(user_id):
+            return True
+        try:
+            return bool(await self.redis.exists(self._sticky_key(user_id)))
+        except RedisError as err:
+            # без Redis не знаємо про зміни в інших воркерах - читаємо з primary
+            logger.warning("Read-your-writes check failed: %s", err)
+            return True
+
+    @staticmethod
+    async def _ping(engine: AsyncEngine) -> None:
+        async with engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+
+    async def _check(self, engine: AsyncEngine) -> bool:
+        # таймаут охоплює і встановлення з'єднання: недоступний хост
+        # інакше тримав би перевірку до таймауту драйвера
+        try:
+            await asyncio.wait_for(self._ping(engine), settings.db_replica_health_timeout)
+            return True
+        except Exception as err:
+            logger.debug("Replica health check failed: %s", err)
+            return False
+
+    async def check_health(self) -> None:
+        results = await asyncio.gather(*(self._check(engine) for engine in self.engines))
+        for index, ok in enumerate(results):
+            if ok != self.healthy[index]:
+                logger.warning(
+                    "Replica %s is %s", self.engines[index].url.render_as_string(),
+                    "back online" if ok else "unavailable, reads go to other replicas or primary"
+                )
+            self.healthy[index] = ok
+
+    async def monitor(self) -> None:
+        """
+        фонова задача воркера (lifespan), лише якщо репліки задано
+        """
+        while True:
+            await self.check_health()
+            await asyncio.sleep(settings.db_replica_health_interval)
+
+    async def dispose(self) -> None:
+        for engine in self.engines:
+            await engine.dispose()
+
+    def stats(self) -> Dict[str, bool]:
+        return {
+            engine.url.render_as_string(): ok
+            for engine, ok in zip(self.engines, self.healthy)
+        }
+
+
+replica_router = ReplicaRouter(settings.db_replica_urls)
+
+
+@asynccontextmanager
+async def read_replica(db: AsyncSession, user: User) -> AsyncIterator[AsyncSession]:
+    """
+    запити сесії в межах блоку йдуть на одну репліку (або на primary, якщо
+    реплік немає, всі недоступні чи користувач щойно змінював дані);
+    лише для читання - об'єкти з репліки можуть трохи відставати
+    """
+    engine = None
+    if replica_router.engines and not await replica_router.is_sticky(user.id):
+        engine = replica_router.choose()
+    if engine is None or "read_engine" in db.info:
+        yield db
+        return
+    db.info["read_engine"] = engine.sync_engine
+    try:
+        yield db
+    finally:
+        db.info.pop("read_engine", None)
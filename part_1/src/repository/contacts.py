@@ -1,39 +1,105 @@
-from typing import List, Optional
-from datetime import date, timedelta
+from typing import AsyncIterator, List, Optional, Sequence, Tuple
+from datetime import date
 
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import func, and_
+from sqlalchemy import (
+    func, and_, or_, tuple_, any_, literal, literal_column, union_all, bindparam,
+    insert, update, delete, text, table, column, String, Integer, ARRAY
+)
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import aliased
 
 from src.database.models import Contact, User
-from src.schemas.schemas import ContactSchema
+from src.database.routing import read_replica, replica_router
+from src.schemas.schemas import ContactSchema, ContactBatchOperationSchema, ContactBatchResultSchema
+from src.configuration.config import settings
+from src.services.pagination import encode_cursor, decode_cursor
+from src.services.birthdays import birthday_window
+from src.services.birthday_calendar import birthday_calendar
+from src.services.response_cache import response_cache
+
+
+# keyset пагінація: замість offset(skip) запит продовжується з ключа сортування
+# останнього запису попередньої сторінки, що використовує індекси (user_id, ...)
+def contacts_cursor(contact: Contact) -> str:
+    return encode_cursor(contact.id)
+
+
+def search_cursor(contact: Contact) -> str:
+    return encode_cursor(contact.last_name, contact.first_name, contact.id)
+
+
+def ranked_cursor(contact: Contact, score: float) -> str:
+    return encode_cursor(score, contact.id)
+
+
+def birthdays_cursor(contact: Contact) -> str:
+    return encode_cursor(contact.birthday_doy, contact.id)
+
+
+async def _contacts_changed(
+    user_id: int,
+    changed: Sequence[Contact] = (),
+    deleted: Sequence[int] = (),
+    rebuild: bool = False
+) -> None:
+    """
+    після commit: нова версія кешу відповідей, оновлення календаря днів
+    народження; читання користувача деякий час йдуть на primary
+    """
+    await replica_router.mark_write(user_id)
+    await response_cache.invalidate(user_id)
+    if rebuild:
+        await birthday_calendar.invalidate(user_id)
+    else:
+        await birthday_calendar.add(user_id, changed)
+        await birthday_calendar.remove(user_id, deleted)
 
 
 async def get_contacts(
     skip: int,
     limit: int,
     user: User,
-    db: Session
+    db: AsyncSession,
+    cursor: Optional[str] = None
 ) -> List[Contact] | None:
-    return db.query(Contact).\
-        filter(Contact.user == user).\
-        offset(skip).limit(limit).all()
+    query = select(Contact).where(Contact.user_id == user.id)
+    if cursor:
+        (last_id,) = decode_cursor(cursor, int)
+        query = query.where(Contact.id > last_id)
+    else:
+        query = query.offset(skip)
+    query = query.order_by(Contact.id).limit(limit)
+    async with read_replica(db, user):
+        result = await db.execute(query)
+    return result.scalars().all()
+
+
+async def _get_own_contact(
+    contact_id: int,
+    user: User,
+    db: AsyncSession
+) -> Contact | None:
+    query = select(Contact).\
+        where(and_(Contact.id == contact_id, Contact.user_id == user.id))
+    result = await db.execute(query)
+    return result.scalars().first()
 
 
 async def get_contact(
     contact_id: int,
     user: User,
-    db: Session
+    db: AsyncSession
 ) -> Contact | None:
-    return db.query(Contact).\
-        filter(and_(Contact.id == contact_id, Contact.user == user)).\
-        first()
+    async with read_replica(db, user):
+        return await _get_own_contact(contact_id, user, db)
 
 
 async def craete_contact(
     data: ContactSchema,
     user: User,
-    db: Session
+    db: AsyncSession
 ) -> Contact:
     new_contact = Contact(
         first_name=data.first_name,
@@ -42,11 +108,12 @@ async def craete_contact(
         phone_number=data.phone_number,
         birthday=data.birthday,
         additional_info=data.additional_info,
-        user=user
+        user_id=user.id
     )
     db.add(new_contact)
-    db.commit()
-    db.refresh(new_contact)
+    await db.commit()
+    await db.refresh(new_contact)
+    await _contacts_changed(user.id, changed=[new_contact])
     return new_contact
 
 
@@ -54,11 +121,10 @@ async def update_contact(
     contact_id: int,
     data: ContactSchema,
     user: User,
-    db: Session
+    db: AsyncSession
 ) -> Contact | None:
-    contact = db.query(Contact).\
-        filter(and_(Contact.id == contact_id, Contact.user == user)).\
-        first()
+    # перед зміною - завжди з primary
+    contact = await _get_own_contact(contact_id, user, db)
     if contact:
         contact.first_name = data.first_name
         contact.last_name = data.last_name
@@ -66,25 +132,140 @@ async def update_contact(
         contact.phone_number = data.phone_number
         contact.birthday = data.birthday
         contact.additional_info = data.additional_info
-        db.commit()
-        db.refresh(contact)
+        await db.commit()
+        await db.refresh(contact)
+        await _contacts_changed(user.id, changed=[contact])
     return contact
 
 
 async def delete_contact(
     contact_id: int,
     user: User,
-    db: Session
+    db: AsyncSession
 ) -> Contact | None:
-    contact = db.query(Contact).\
-        filter(and_(Contact.id == contact_id, Contact.user == user)).\
-        first()
+    # перед зміною - завжди з primary
+    contact = await _get_own_contact(contact_id, user, db)
     if contact:
-        db.delete(contact)
-        db.commit()
+        await db.delete(contact)
+        await db.commit()
+        await _contacts_changed(user.id, deleted=[contact.id])
     return contact
 
 
+EXPORT_COLUMNS = (
+    Contact.id, Contact.first_name, Contact.last_name, Contact.email,
+    Contact.phone_number, Contact.birthday, Contact.additional_info
+)
+
+
+async def stream_contacts(
+    user: User,
+    db: AsyncSession,
+    batch_size: int = 1000
+) -> AsyncIterator[list]:
+    """
+    всі контакти користувача частинами по batch_size рядків через серверний
+    курсор (yield_per) - в пам'яті одночасно лише одна частина; повертає
+    рядки зі стовпцями EXPORT_COLUMNS, без створення ORM об'єктів
+    """
+    query = select(*EXPORT_COLUMNS).\
+        where(Contact.user_id == user.id).\
+        order_by(Contact.id).\
+        execution_options(yield_per=batch_size)
+    async with read_replica(db, user):
+        result = await db.stream(query)
+        async for rows in result.partitions():
+            yield rows
+
+
+# тимчасова таблиця для масового імпорту, існує до кінця транзакції
+IMPORT_STAGING_COLUMNS = (
+    "line", "first_name", "last_name", "email", "phone_number", "birthday", "additional_info"
+)
+_import_staging = table("contacts_import", *(column(name) for name in IMPORT_STAGING_COLUMNS))
+
+_CREATE_IMPORT_STAGING = text("""
+    CREATE TEMP TABLE contacts_import (
+        line integer NOT NULL,
+        first_name varchar(50) NOT NULL,
+        last_name varchar(50) NOT NULL,
+        email varchar(100) NOT NULL,
+        phone_number varchar(20) NOT NULL,
+        birthday date NOT NULL,
+        additional_info text
+    ) ON COMMIT DROP
+""")
+
+# переносить частину з тимчасової таблиці в contacts; повертає рядки, які не
+# вставлені: email вже існує або повторюється у файлі (вставляється перший)
+_MERGE_IMPORT_STAGING = text("""
+    WITH inserted AS (
+        INSERT INTO contacts (
+            first_name, last_name, email, phone_number, birthday,
+            additional_info, user_id, created_at
+        )
+        SELECT DISTINCT ON (email)
+            first_name, last_name, email, phone_number, birthday,
+            additional_info, :user_id, now()
+        FROM contacts_import
+        ORDER BY email, line
+        ON CONFLICT (email) DO NOTHING
+        RETURNING email
+    ), first_lines AS (
+        SELECT email, min(line) AS line FROM contacts_import GROUP BY email
+    )
+    SELECT s.line, i.email IS NOT NULL AS duplicate_in_file
+    FROM contacts_import s
+    JOIN first_lines f ON f.email = s.email
+    LEFT JOIN inserted i ON i.email = s.email
+    WHERE i.email IS NULL OR s.line <> f.line
+""")
+
+
+async def _copy_to_import_staging(records: List[tuple], db: AsyncSession) -> None:
+    connection = await db.connection()
+    if connection.dialect.driver == "asyncpg":
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(
+            "contacts_import", records=records, columns=IMPORT_STAGING_COLUMNS
+        )
+    else:
+        # інші драйвери - багаторядковий INSERT
+        await db.execute(
+            _import_staging.insert(),
+            [dict(zip(IMPORT_STAGING_COLUMNS, record)) for record in records]
+        )
+
+
+async def import_contacts(
+    chunks: AsyncIterator[List[Tuple[int, ContactSchema]]],
+    user: User,
+    db: AsyncSession
+) -> AsyncIterator[Tuple[int, List[Tuple[int, str]]]]:
+    """
+    масовий імпорт в одній транзакції: кожна частина (номер рядка, контакт)
+    завантажується COPY в тимчасову таблицю і переноситься в contacts одним
+    INSERT ... SELECT; для кожної частини повертає (кількість вставлених,
+    [(номер рядка, причина відмови)])
+    """
+    await db.execute(_CREATE_IMPORT_STAGING)
+    async for rows in chunks:
+        await _copy_to_import_staging([
+            (line, data.first_name, data.last_name, data.email,
+             data.phone_number, data.birthday, data.additional_info)
+            for line, data in rows
+        ], db)
+        result = await db.execute(_MERGE_IMPORT_STAGING, {"user_id": user.id})
+        rejected = [
+            (line, "duplicate email in file" if duplicate_in_file else "email already exists")
+            for line, duplicate_in_file in result.all()
+        ]
+        await db.execute(text("TRUNCATE contacts_import"))
+        yield len(rows) - len(rejected), rejected
+    await db.commit()
+    await _contacts_changed(user.id, rebuild=True)
+
+
 async def search_contacts(
     first_name: Optional[str],
     last_name: Optional[str],
@@ -92,39 +273,269 @@ async def search_contacts(
     user: User,
     skip: int,
     limit: int,
-    db: Session
+    db: AsyncSession,
+    cursor: Optional[str] = None
 ) -> List[Contact]:
     # print(email)
     query = select(Contact)
-    query = query.where(Contact.user == user)
+    query = query.where(Contact.user_id == user.id)
     if first_name:
         query = query.where(Contact.first_name.ilike(f"%{first_name}%"))
     if last_name:
         query = query.where(Contact.last_name.ilike(f"%{last_name}%"))
     if email:
         query = query.where(Contact.email.ilike(f"%{email}%"))
-    query = query.offset(skip).limit(limit)
-    print(query)
-    result = db.execute(query)
+    sort_key = (Contact.last_name, Contact.first_name, Contact.id)
+    if cursor:
+        last_key = decode_cursor(cursor, str, str, int)
+        query = query.where(tuple_(*sort_key) > tuple_(*last_key))
+    else:
+        query = query.offset(skip)
+    query = query.order_by(*sort_key).limit(limit)
+    async with read_replica(db, user):
+        result = await db.execute(query)
     return result.scalars().all()
 
 
+# вираз має збігатися з індексом ix_contacts_search_trgm (міграція 960068c13333),
+# тому пробіли - літерали, а не параметри запиту
+_space = literal_column("' '", String)
+contact_search_text = Contact.first_name + _space + Contact.last_name + _space + Contact.email
+
+
+async def rank_search_contacts(
+    q: str,
+    user: User,
+    skip: int,
+    limit: int,
+    db: AsyncSession,
+    cursor: Optional[str] = None
+) -> List[Tuple[Contact, float]]:
+    """
+    пошук одним рядком q по імені, прізвищу та email з урахуванням
+    помилок (pg_trgm), результати впорядковані за релевантністю
+    """
+    score = func.word_similarity(literal(q, String), contact_search_text)
+    query = select(Contact, score.label("score")).where(
+        Contact.user_id == user.id,
+        or_(
+            contact_search_text.ilike(f"%{q}%"),
+            # <% та || мають однаковий пріоритет в Postgres - праву частину в дужки
+            literal(q, String).op("<%", is_comparison=True)(contact_search_text.self_group())
+        )
+    )
+    if cursor:
+        last_score, last_id = decode_cursor(cursor, (int, float), int)
+        query = query.where(or_(
+            score < last_score,
+            and_(score == last_score, Contact.id > last_id)
+        ))
+    else:
+        query = query.offset(skip)
+    query = query.order_by(score.desc(), Contact.id).limit(limit)
+    async with read_replica(db, user):
+        # поріг схожості для оператора <% діє лише в межах поточної транзакції,
+        # тому встановлюється на тому ж з'єднанні, що й пошук
+        await db.execute(
+            select(func.set_config(
+                'pg_trgm.word_similarity_threshold',
+                str(settings.search_similarity_threshold),
+                True
+            ))
+        )
+        result = await db.execute(query)
+    return [(contact, score) for contact, score in result.all()]
+
+
 async def upcoming_birthdays(
     days: int,
     skip: int,
     limit: int,
     user: User,
-    db: Session
+    db: AsyncSession,
+    cursor: Optional[str] = None
 ) -> List[Contact]:
-    today = date.today()
-    filter_lst = {(today + timedelta(days=i)).strftime("%m-%d")
-                  for i in range(days)}
-    query = select(Contact).where(
-        func.to_char(Contact.birthday, 'MM-DD').in_(filter_lst)
-    )
-    query = query.where(Contact.user == user)
-    query = query.offset(skip).limit(limit)
-    print(query)
-    # result = await db.execute(query)
-    result = db.execute(query)
+    """
+    контакти з днем народження в найближчі days днів, впорядковані за
+    наступним днем народження; читаються з календаря в Redis, який
+    будується з бази при першому зверненні
+    """
+    segments = birthday_window(date.today(), days)
+    after = None
+    if cursor:
+        after = tuple(decode_cursor(cursor, int, int))
+        # пропускаємо діапазони до того, в якому закінчилась попередня сторінка
+        while segments and not segments[0][0] <= after[0] <= segments[0][1]:
+            segments.pop(0)
+        skip = 0
+    contacts = await birthday_calendar.upcoming(user.id, segments, skip, limit, after)
+    if contacts is not None:
+        return contacts
+    # календар будується з primary: знімок з репліки, що відстає, лишився б
+    # в Redis до наступної зміни контактів
+    if await birthday_calendar.rebuild(user.id, db):
+        contacts = await birthday_calendar.upcoming(user.id, segments, skip, limit, after)
+    if contacts is None:
+        async with read_replica(db, user):
+            contacts = await _upcoming_birthdays_from_db(segments, skip, limit, user, db, after)
+    return contacts
+
+
+async def _upcoming_birthdays_from_db(
+    segments: List[Tuple[int, int]],
+    skip: int,
+    limit: int,
+    user: User,
+    db: AsyncSession,
+    after: Optional[Tuple[int, int]] = None
+) -> List[Contact]:
+    """
+    кожен діапазон днів року - окремий впорядкований прохід
+    індексу (user_id, birthday_doy, id)
+    """
+    queries = []
+    for position, (low, high) in enumerate(segments):
+        query = select(Contact, literal(position).label("segment")).where(
+            Contact.user_id == user.id,
+            Contact.birthday_doy.between(low, high)
+        )
+        if after is not None and position == 0:
+            query = query.where(
+                tuple_(Contact.birthday_doy, Contact.id) > tuple_(*after)
+            )
+        queries.append(
+            query.order_by(Contact.birthday_doy, Contact.id).limit(skip + limit)
+        )
+    if not queries:
+        return []
+    window = union_all(*queries).subquery()
+    contact = aliased(Contact, window, adapt_on_names=True)
+    query = select(contact).\
+        order_by(window.c.segment, window.c.birthday_doy, window.c.id).\
+        offset(skip).limit(limit)
+    result = await db.execute(query)
     return result.scalars().all()
+
+
+def _ids_filter(ids: List[int]):
+    # id = ANY(:ids) - один параметр-масив, текст запиту не залежить від кількості id
+    return Contact.id == any_(bindparam("ids", ids, type_=ARRAY(Integer)))
+
+
+async def batch_contacts(
+    operations: List[ContactBatchOperationSchema],
+    user: User,
+    db: AsyncSession
+) -> List[ContactBatchResultSchema]:
+    """
+    створення, оновлення та видалення контактів однією транзакцією:
+    перевірки - двома запитами, зміни - одним DELETE ... WHERE id = ANY(...),
+    одним пакетним UPDATE та одним INSERT ... RETURNING; DELETE виконується
+    першим, тож email контакту, видаленого в цьому ж пакеті, можна використати
+    для create чи update (але не email, який звільняє update іншого контакту)
+    """
+    results: List[Optional[ContactBatchResultSchema]] = [None] * len(operations)
+
+    def reject(index: int, status: int, detail: str) -> None:
+        operation = operations[index]
+        results[index] = ContactBatchResultSchema(
+            index=index, op=operation.op, id=operation.id, status=status, detail=detail
+        )
+
+    ids = list({operation.id for operation in operations if operation.id is not None})
+    owned = set()
+    if ids:
+        owned = set((await db.scalars(
+            select(Contact.id).where(Contact.user_id == user.id, _ids_filter(ids))
+        )).all())
+    emails = list({operation.data.email for operation in operations if operation.data is not None})
+    email_owners = {}
+    if emails:
+        email_owners = dict((await db.execute(
+            select(Contact.email, Contact.id).
+            where(Contact.email == any_(bindparam("emails", emails, type_=ARRAY(String))))
+        )).all())
+
+    # контакти, видалення яких буде прийняте: ті ж перевірки id, що й нижче
+    freed, checked_ids = set(), set()
+    for operation in operations:
+        if operation.id in owned and operation.id not in checked_ids:
+            checked_ids.add(operation.id)
+            if operation.op == "delete":
+                freed.add(operation.id)
+
+    seen_ids, seen_emails = set(), set()
+    indexes = {"create": [], "update": [], "delete": []}
+    for index, operation in enumerate(operations):
+        if operation.id is not None and operation.id not in owned:
+            reject(index, 404, f"Contact id = {operation.id} is not found.")
+            continue
+        if operation.id in seen_ids:
+            reject(index, 409, "Contact is changed by another operation in this batch.")
+            continue
+        if operation.data is not None:
+            owner = email_owners.get(operation.data.email)
+            if owner in freed:
+                owner = None
+            if operation.data.email in seen_emails or owner not in (None, operation.id):
+                reject(index, 409, "Contact with this email already exists.")
+                continue
+            seen_emails.add(operation.data.email)
+        if operation.id is not None:
+            seen_ids.add(operation.id)
+        indexes[operation.op].append(index)
+
+    deleted_ids = [operations[index].id for index in indexes["delete"]]
+    updated_ids = [operations[index].id for index in indexes["update"]]
+    try:
+        if deleted_ids:
+            await db.execute(
+                delete(Contact).where(Contact.user_id == user.id, _ids_filter(deleted_ids))
+            )
+        if updated_ids:
+            # пакетний UPDATE за первинним ключем (executemany)
+            await db.execute(update(Contact), [
+                {"id": operations[index].id, **operations[index].data.model_dump()}
+                for index in indexes["update"]
+            ])
+        created = []
+        if indexes["create"]:
+            created = (await db.scalars(
+                insert(Contact).returning(Contact, sort_by_parameter_order=True),
+                [
+                    {**operations[index].data.model_dump(), "user_id": user.id}
+                    for index in indexes["create"]
+                ]
+            )).all()
+        updated = {}
+        if updated_ids:
+            updated = {
+                contact.id: contact
+                for contact in (await db.scalars(
+                    select(Contact).where(_ids_filter(updated_ids)).
+                    execution_options(populate_existing=True)
+                )).all()
+            }
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise
+
+    for index, contact in zip(indexes["create"], created):
+        results[index] = ContactBatchResultSchema(
+            index=index, op="create", id=contact.id, status=201,
+            contact=ContactSchema.model_validate(contact, from_attributes=True)
+        )
+    for index in indexes["update"]:
+        contact = updated[operations[index].id]
+        results[index] = ContactBatchResultSchema(
+            index=index, op="update", id=contact.id, status=200,
+            contact=ContactSchema.model_validate(contact, from_attributes=True)
+        )
+    for index in indexes["delete"]:
+        results[index] = ContactBatchResultSchema(
+            index=index, op="delete", id=operations[index].id, status=204
+        )
+
+    await _contacts_changed(user.id, changed=[*created, *updated.values()], deleted=deleted_ids)
+    return results
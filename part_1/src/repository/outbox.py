@@ -0,0 +1,105 @@
+from datetime import timedelta
+from typing import List, Sequence
+
+from sqlalchemy import select, update, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.models import EmailOutbox
+
+
+async def enqueue_email(
+    recipient: str,
+    subject: str,
+    template_name: str,
+    template_body: dict,
+    db: AsyncSession
+) -> EmailOutbox:
+    """
+    лише додає лист в сесію (без commit): він зберігається в одній
+    транзакції зі змінами, що його спричинили, - commit робить викликач
+    """
+    message = EmailOutbox(
+        recipient=recipient,
+        subject=subject,
+        template_name=template_name,
+        template_body=template_body
+    )
+    db.add(message)
+    await db.flush()
+    return message
+
+
+async def claim_emails(limit: int, lease: int, db: AsyncSession) -> List[EmailOutbox]:
+    """
+    бере до limit листів, що очікують надсилання; SKIP LOCKED дозволяє
+    кільком воркерам працювати паралельно, а next_attempt_at зсувається
+    на lease секунд - якщо воркер впаде, лист буде взято знову;
+    attempts не змінюється - спробою вважається лише невдале надсилання
+    """
+    claimable = (
+        select(EmailOutbox.id)
+        .where(
+            EmailOutbox.status == EmailOutbox.PENDING,
+            EmailOutbox.next_attempt_at <= func.now()
+        )
+        .order_by(EmailOutbox.next_attempt_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    result = await db.execute(
+        update(EmailOutbox)
+        .where(EmailOutbox.id.in_(claimable))
+        .values(next_attempt_at=func.now() + timedelta(seconds=lease))
+        .returning(EmailOutbox)
+        .execution_options(synchronize_session=False)
+    )
+    messages = list(result.scalars().all())
+    await db.commit()
+    return messages
+
+
+async def mark_sent(ids: Sequence[int], db: AsyncSession) -> None:
+    if not ids:
+        return
+    await db.execute(
+        update(EmailOutbox)
+        .where(EmailOutbox.id.in_(ids))
+        .values(status=EmailOutbox.SENT, sent_at=func.now(), last_error=None)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+
+
+async def mark_failed(message: EmailOutbox, error: str, retry_in: float | None, db: AsyncSession) -> None:
+    """
+    retry_in - через скільки секунд повторити; None - спроби вичерпано
+    """
+    values = {"last_error": error[:2000], "attempts": EmailOutbox.attempts + 1}
+    if retry_in is None:
+        values["status"] = EmailOutbox.FAILED
+    else:
+        values["next_attempt_at"] = func.now() + timedelta(seconds=retry_in)
+    await db.execute(
+        update(EmailOutbox)
+        .where(EmailOutbox.id == message.id)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+
+
+async def release_emails(ids: Sequence[int], db: AsyncSession) -> None:
+    """
+    повертає взяті, але не надіслані листи в чергу одразу, без очікування
+    lease; attempts не змінюється
+    """
+    if not ids:
+        return
+    await db.execute(
+        update(EmailOutbox)
+        .where(EmailOutbox.id.in_(ids), EmailOutbox.status == EmailOutbox.PENDING)
+        .values(next_attempt_at=func.now())
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
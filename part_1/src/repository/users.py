@@ -1,39 +1,73 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
 
 from src.database.models import User
 from src.schemas.schemas import UserModel
+from src.services.user_cache import user_cache
 
 
-async def get_user_by_email(email: str, db: Session) -> User | None:
-    return db.query(User).filter(User.email == email).first()
+async def get_user_by_email(email: str, db: AsyncSession) -> User | None:
+    result = await db.execute(select(User).where(User.email == email))
+    return result.scalars().first()
 
 
-async def create_user(body: UserModel, db: Session) -> User:
+async def create_user(body: UserModel, db: AsyncSession) -> User:
     new_user = User(**body.model_dump())
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
     return new_user
 
 
-async def update_token(user: User, token: str | None, db: Session) -> None:
-    user.refresh_token = token
-    db.commit()
+# user може бути об'єктом з кешу (не прив'язаним до сесії),
+# тому зміни записуємо явним UPDATE по id, а в об'єкті лише оновлюємо значення;
+# після commit оновлюємо кеш користувачів (write-through) у всіх воркерах
+async def update_token(
+    user: User,
+    token: str | None,
+    db: AsyncSession,
+    password_hash: str | None = None
+) -> None:
+    """
+    password_hash - перехешований при вході пароль (новий cost bcrypt),
+    зберігається в тій же транзакції, що й refresh_token
+    """
+    values = {"refresh_token": token}
+    if password_hash is not None:
+        values["password"] = password_hash
+    await db.execute(
+        update(User).where(User.id == user.id).values(**values)
+    )
+    await db.commit()
+    for attr, value in values.items():
+        set_committed_value(user, attr, value)
+    await user_cache.refresh(user)
 
 
-async def confirmed_email(email: str, db: Session) -> None:
-    user = await get_user_by_email(email, db)
-    user.confirmed = True
-    db.commit()
+async def confirmed_email(email: str, db: AsyncSession) -> None:
+    await db.execute(
+        update(User).where(User.email == email).values(confirmed=True)
+    )
+    await db.commit()
+    await user_cache.invalidate(email)
 
 
-async def update_user_password(user: UserModel, new_password_hash: str, db: Session) -> None:
-    user.password = new_password_hash
-    db.commit()
+async def update_user_password(user: User, new_password_hash: str, db: AsyncSession) -> None:
+    await db.execute(
+        update(User).where(User.id == user.id).values(password=new_password_hash)
+    )
+    await db.commit()
+    set_committed_value(user, 'password', new_password_hash)
+    await user_cache.refresh(user)
 
 
-async def update_user_avatar(user: UserModel, url: str, db: Session) -> UserModel:
+async def update_user_avatar(user: User, url: str, db: AsyncSession) -> User:
     # user = await get_user_by_email(email, db)
-    user.avatar = url
-    db.commit()
+    await db.execute(
+        update(User).where(User.id == user.id).values(avatar=url)
+    )
+    await db.commit()
+    set_committed_value(user, 'avatar', url)
+    await user_cache.refresh(user)
     return user
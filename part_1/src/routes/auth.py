@@ -1,18 +1,19 @@
 # from typing import List
 
-from fastapi import APIRouter, HTTPException, Depends, status, Security, BackgroundTasks, Request
+from fastapi import APIRouter, HTTPException, Depends, status, Security, Request
 from fastapi.security import (
     OAuth2PasswordRequestForm,
     HTTPAuthorizationCredentials,
     HTTPBearer
 )
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.database.db import get_db
+from src.database.db import get_async_db
+from src.database.models import User
 from src.schemas.schemas import UserModel, UserResponseModel, TokenModel, RequestEmail, ResetPasswordRequest
 from src.repository import users as rep_users
 from src.services.auth import auth_service
-from src.services.email import send_verificatoin_email, send_reset_password_email
+from src.services.email import enqueue_verification_email, enqueue_reset_password_email
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 security = HTTPBearer()
@@ -25,9 +26,8 @@ security = HTTPBearer()
 )
 async def signup(
     body: UserModel,
-    background_task: BackgroundTasks,
     request: Request,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     exist_user = await rep_users.get_user_by_email(body.email, db)
     # exist_user = await auth_service.get_current_user(body.email, db)
@@ -36,14 +36,16 @@ async def signup(
             status_code=status.HTTP_409_CONFLICT,
             detail="Account already exists"
         )
-    body.password = auth_service.get_password_hash(body.password)
-    new_user = await rep_users.create_user(body, db)
-    background_task.add_task(
-        send_verificatoin_email,
-        new_user.email,
-        new_user.username,
-        request.base_url
+    body.password = await auth_service.get_password_hash(body.password)
+    # лист додається в сесію до створення користувача: create_user комітить
+    # обидва записи разом, тож користувача без листа (чи навпаки) не буде
+    await enqueue_verification_email(
+        body.email,
+        body.username,
+        request.base_url,
+        db
     )
+    new_user = await rep_users.create_user(body, db)
     return {
         "user": new_user,
         "detail": "User successfully created. Check your email for confirmation."
@@ -53,7 +55,7 @@ async def signup(
 @router.post("/login", response_model=TokenModel)
 async def login(
     body: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     user = await rep_users.get_user_by_email(body.username, db)
     # user = await auth_service.get_current_user(body.username, db)
@@ -67,7 +69,10 @@ async def login(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Email not verified. Please check your mailbox."
         )
-    if not auth_service.verify_password(body.password, user.password):
+    verified, new_password_hash = await auth_service.verify_and_update_password(
+        body.password, user.password
+    )
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid password"
@@ -78,7 +83,7 @@ async def login(
     refresh_token = await auth_service.create_refresh_token(
         data={"sub": user.email}
     )
-    await rep_users.update_token(user, refresh_token, db)
+    await rep_users.update_token(user, refresh_token, db, password_hash=new_password_hash)
     return {
         "access_token": access_token,
         "refresh_token": refresh_token,
@@ -89,12 +94,17 @@ async def login(
 @router.get("/refresh_token", response_model=TokenModel)
 async def refresh_token(
     credentials: HTTPAuthorizationCredentials = Security(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     token = credentials.credentials
     email = await auth_service.decode_refresh_token(token)
-    # user = await rep_users.get_user_by_email(email, db)
-    user = await auth_service.get_current_user(email, db)
+    # refresh_token порівнюємо з актуальним значенням в базі, а не з кешу
+    user = await rep_users.get_user_by_email(email, db)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token"
+        )
 
     if user.refresh_token != token:
         await rep_users.update_token(user, None, db)
@@ -117,8 +127,24 @@ async def refresh_token(
     }
 
 
+@router.post("/logout")
+async def logout(
+    token: str = Depends(auth_service.oauth2_schema),
+    user: User = Depends(auth_service.get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    refresh токен видаляється, access токен відкликається до свого exp
+    (відхиляється іншими воркерами, якщо jwt_revocation_check увімкнено)
+    """
+    payload = auth_service.decode_access_token(token)
+    await auth_service.revoke_token(token, expires_at=payload["exp"])
+    await rep_users.update_token(user, None, db)
+    return {"message": "Successfully logged out."}
+
+
 @router.get("/confirmed_email/{token}")
-async def confirmed_email(token: str, db: Session = Depends(get_db)):
+async def confirmed_email(token: str, db: AsyncSession = Depends(get_async_db)):
     email = await auth_service.get_email_from_token(token)
     user = await rep_users.get_user_by_email(email, db)
     # user = await auth_service.get_current_user(email, db)
@@ -136,30 +162,29 @@ async def confirmed_email(token: str, db: Session = Depends(get_db)):
 @router.post('/request-email-verification')
 async def request_email_verification(
     body: RequestEmail,
-    background_task: BackgroundTasks,
     request: Request,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     user = await rep_users.get_user_by_email(body.email, db)
     # user = await auth_service.get_current_user(body.email, db)
-    if user.confirmed:
+    if user and user.confirmed:
         return {"message": "Your email is already confirmed"}
     if user:
-        background_task.add_task(
-            send_verificatoin_email,
+        await enqueue_verification_email(
             user.email,
             user.username,
-            request.base_url
+            request.base_url,
+            db
         )
+        await db.commit()
     return {"message": "Check your mailbox for confirmation."}
 
 
 @router.post('/request-reset-password')
 async def request_reset_password(
     body: RequestEmail,
-    background_task: BackgroundTasks,
     request: Request,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     запит на скидання паролю
@@ -172,25 +197,25 @@ async def request_reset_password(
             status_code=404,
             detail="User is not found"
         )
-    background_task.add_task(
-            send_reset_password_email,
-            user.email,
-            user.username,
-            request.base_url
-        )
+    await enqueue_reset_password_email(
+        user.email,
+        user.username,
+        request.base_url,
+        db
+    )
+    await db.commit()
     return {"message": "Check your mailbox to continue resetting your password on web-site."}
 
 
 @router.post('/reset-password')
 async def reset_password(
     body: ResetPasswordRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     логіка скидання паролю
     """
     email = await auth_service.get_email_from_token(body.token)
-    print(email)
     user = await rep_users.get_user_by_email(email, db)
     # user = await auth_service.get_current_user(email, db)
 
@@ -200,6 +225,6 @@ async def reset_password(
             detail="User is not found"
         )
 
-    hashed_password = auth_service.get_password_hash(body.new_password)
+    hashed_password = await auth_service.get_password_hash(body.new_password)
     await rep_users.update_user_password(user, hashed_password, db)
     return {"message": "Password is successfully updated."}
@@ -1,123 +1,275 @@
+from datetime import date
 from typing import List, Optional
 
-from fastapi import APIRouter, HTTPException, Depends, status, Query, Path
-from fastapi_limiter import FastAPILimiter
-from fastapi_limiter.depends import RateLimiter
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, HTTPException, Depends, status, Query, Path, Request, UploadFile, File
+from fastapi.responses import StreamingResponse
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.database.db import get_db
-from src.database.models import User
-from src.schemas.schemas import ContactSchema
+from src.database.db import get_async_db
+from src.database.models import Contact, User
+from src.schemas.schemas import (
+    ContactSchema,
+    ContactResponse,
+    ContactListAdapter,
+    ContactImportReportSchema,
+    ContactBatchRequestSchema,
+    ContactBatchResponseSchema
+)
 from src.repository import contacts as rep_contacts
 from src.services.auth import current_active_user
+from src.services.rate_limiter import rate_limit
+from src.services.response_cache import response_cache
+from src.services.contacts_io import (
+    detect_import_format,
+    import_contacts_file,
+    export_contacts,
+    EXPORT_FORMATS
+)
 
 
 router = APIRouter(prefix="/contacts", tags=["contacts"])
 
+# заголовок з курсором наступної сторінки (keyset пагінація)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def invalid_cursor_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Invalid cursor."
+    )
+
+
+def serialize_contacts(contacts: List[Contact]) -> bytes:
+    # ORM об'єкти -> JSON одним викликом pydantic-core, без проміжних dict
+    return ContactListAdapter.dump_json(
+        ContactListAdapter.validate_python(contacts, from_attributes=True)
+    )
+
 
 @router.get(
     "",
-    response_model=List[ContactSchema],
-    dependencies=[Depends(RateLimiter(times=1, seconds=2))]
+    response_model=List[ContactResponse],
+    dependencies=[Depends(rate_limit("contacts:list"))]
 )
 async def read_contacts(
+    request: Request,
+    q: Optional[str] = Query(None, min_length=1, max_length=100),
     first_name: Optional[str] = Query(None),
     last_name: Optional[str] = Query(None),
     email: Optional[str] = Query(None),
     skip: Optional[int] = Query(0, ge=0),
     limit: Optional[int] = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, max_length=512),
     user: User = Depends(current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    if first_name is not None or last_name is not None or email is not None:
-        # шукаємо контакти, якщо було вказано пошукові фільтри
-        contacts = await rep_contacts.search_contacts(
-            first_name,
-            last_name,
-            email,
-            skip,
-            limit,
-            user,
-            db
-        )
-    else:
-        # просто повертаємо список контактів
-        contacts = await rep_contacts.get_contacts(skip, limit, user, db)
+    """
+    q - пошук одним рядком по імені, прізвищу та email (з урахуванням помилок),
+    результати впорядковані за релевантністю;
+    cursor - значення заголовка X-Next-Cursor попередньої сторінки;
+    якщо вказано, skip ігнорується
+    """
+    async def produce():
+        try:
+            if q is not None:
+                rows = await rep_contacts.rank_search_contacts(q, user, skip, limit, db, cursor)
+                contacts = [contact for contact, _ in rows]
+                last_key = rows[-1] if rows else ()
+                make_cursor = rep_contacts.ranked_cursor
+            elif first_name is not None or last_name is not None or email is not None:
+                # шукаємо контакти, якщо було вказано пошукові фільтри
+                contacts = await rep_contacts.search_contacts(
+                    first_name,
+                    last_name,
+                    email,
+                    user,
+                    skip,
+                    limit,
+                    db,
+                    cursor
+                )
+                last_key = contacts[-1:]
+                make_cursor = rep_contacts.search_cursor
+            else:
+                # просто повертаємо список контактів
+                contacts = await rep_contacts.get_contacts(skip, limit, user, db, cursor)
+                last_key = contacts[-1:]
+                make_cursor = rep_contacts.contacts_cursor
+        except ValueError:
+            raise invalid_cursor_exception()
 
-    if not contacts:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Contacts are not found.")
+        if not contacts:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Contacts are not found.")
 
-    return contacts
+        headers = {}
+        if len(contacts) == limit:
+            headers[NEXT_CURSOR_HEADER] = make_cursor(*last_key)
+        return serialize_contacts(contacts), headers
+
+    return await response_cache.cached_json(
+        request, user.id, "read_contacts", request.query_params.multi_items(), produce
+    )
 
 
 @router.get(
     "/upcoming_birthdays",
-    response_model=List[ContactSchema],
-    dependencies=[Depends(RateLimiter(times=1, seconds=2))]
+    response_model=List[ContactResponse],
+    dependencies=[Depends(rate_limit("contacts:birthdays"))]
 )
 async def get_upcoming_birthdays(
+    request: Request,
     days: Optional[int] = Query(7, ge=1, le=365),
     skip: Optional[int] = Query(0, ge=0),
     limit: Optional[int] = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, max_length=512),
     user: User = Depends(current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     # print(f"{days}, {skip}, {limit}")
-    contacts = await rep_contacts.upcoming_birthdays(
-        days, skip, limit, user, db
+    async def produce():
+        try:
+            contacts = await rep_contacts.upcoming_birthdays(
+                days, skip, limit, user, db, cursor
+            )
+        except ValueError:
+            raise invalid_cursor_exception()
+        if not contacts:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Birthday's contacts are not found."
+            )
+        headers = {}
+        if len(contacts) == limit:
+            headers[NEXT_CURSOR_HEADER] = rep_contacts.birthdays_cursor(contacts[-1])
+        return serialize_contacts(contacts), headers
+
+    # вікно днів залежить від поточної дати
+    params = [*request.query_params.multi_items(), ("today", date.today().isoformat())]
+    return await response_cache.cached_json(
+        request, user.id, "upcoming_birthdays", params, produce
+    )
+
+
+@router.get(
+    "/export",
+    response_class=StreamingResponse,
+    dependencies=[Depends(rate_limit("contacts:export"))]
+)
+async def export_all_contacts(
+    file_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv|vcard)$"),
+    user: User = Depends(current_active_user)
+):
+    """
+    завантаження всіх контактів користувача файлом NDJSON, CSV або vCard
+    """
+    media_type, extension, _, _ = EXPORT_FORMATS[file_format]
+    return StreamingResponse(
+        export_contacts(user, file_format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="contacts.{extension}"'}
     )
-    if not contacts:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Birthday's contacts are not found."
-        )
-    return contacts
 
 
 @router.get(
     "/{contact_id}",
-    response_model=ContactSchema,
-    dependencies=[Depends(RateLimiter(times=1, seconds=2))]
+    response_model=ContactResponse,
+    dependencies=[Depends(rate_limit("contacts:read"))]
 )
 async def read_contact(
+    request: Request,
     contact_id: int = Path(ge=1),
     user: User = Depends(current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    contact = await rep_contacts.get_contact(contact_id, user, db)
-    if contact is None:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Contact id = {contact_id} is not found.")
-    return contact
+    async def produce():
+        contact = await rep_contacts.get_contact(contact_id, user, db)
+        if contact is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Contact id = {contact_id} is not found.")
+        return ContactResponse.model_validate(contact).model_dump_json().encode("utf-8"), {}
+
+    return await response_cache.cached_json(
+        request, user.id, "read_contact", [("contact_id", str(contact_id))], produce
+    )
 
 
 @router.post(
     "",
-    response_model=ContactSchema,
-    dependencies=[Depends(RateLimiter(times=1, seconds=2))],
+    response_model=ContactResponse,
+    dependencies=[Depends(rate_limit("contacts:create"))],
     status_code=status.HTTP_201_CREATED
 )
 async def create_contact(
     data: ContactSchema,
     user: User = Depends(current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     return await rep_contacts.craete_contact(data, user, db)
 
 
+@router.post(
+    "/import",
+    response_model=ContactImportReportSchema,
+    dependencies=[Depends(rate_limit("contacts:import"))]
+)
+async def import_contacts(
+    file: UploadFile = File(),
+    file_format: Optional[str] = Query(None, alias="format", pattern="^(csv|ndjson)$"),
+    user: User = Depends(current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    масовий імпорт контактів з CSV (з заголовком) або NDJSON файлу;
+    формат визначається параметром format або розширенням файлу
+    """
+    file_format = file_format or detect_import_format(file.filename, file.content_type)
+    if file_format is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Unsupported file format. Use csv or ndjson."
+        )
+    return await import_contacts_file(file.file, file_format, user, db)
+
+
+@router.post(
+    "/batch",
+    response_model=ContactBatchResponseSchema,
+    dependencies=[Depends(rate_limit("contacts:batch"))]
+)
+async def batch_contacts(
+    body: ContactBatchRequestSchema,
+    user: User = Depends(current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    пакет операцій create/update/delete, що виконуються однією транзакцією;
+    результат кожної операції - окремо, в тому ж порядку
+    """
+    try:
+        results = await rep_contacts.batch_contacts(body.operations, user, db)
+    except IntegrityError:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Batch conflicts with concurrent changes, nothing was applied."
+        )
+    return {"results": results}
+
+
 @router.put(
     "/{contact_id}",
-    response_model=ContactSchema,
-    dependencies=[Depends(RateLimiter(times=1, seconds=2))]
+    response_model=ContactResponse,
+    dependencies=[Depends(rate_limit("contacts:update"))]
 )
 async def update_contact(
     data: ContactSchema,
     contact_id: int = Path(ge=1),
     user: User = Depends(current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     contact = await rep_contacts.update_contact(contact_id, data, user, db)
     if contact is None:
@@ -131,12 +283,12 @@ async def update_contact(
 @router.delete(
     "/{contact_id}",
     status_code=status.HTTP_204_NO_CONTENT,
-    dependencies=[Depends(RateLimiter(times=1, seconds=2))]
+    dependencies=[Depends(rate_limit("contacts:delete"))]
 )
 async def delete_contact(
     contact_id: int = Path(ge=1),
     user: User = Depends(current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     contact = await rep_contacts.delete_contact(contact_id, user, db)
     if contact is None:
@@ -1,6 +1,6 @@
 from datetime import date, datetime
-from pydantic import BaseModel, Field, EmailStr
-from typing import Optional
+from pydantic import BaseModel, ConfigDict, Field, EmailStr, TypeAdapter, model_validator
+from typing import List, Literal, Optional
 
 
 class ContactSchema(BaseModel):
@@ -12,6 +12,70 @@ class ContactSchema(BaseModel):
     additional_info: Optional[str] = Field()
 
 
+class ContactResponse(BaseModel):
+    """
+    контакт у відповіді: читається напряму з ORM об'єкта; поля не
+    перевіряються повторно (EmailStr, довжини) - дані вже валідні в базі
+    """
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    first_name: str
+    last_name: str
+    email: str
+    phone_number: str
+    birthday: date
+    additional_info: Optional[str] = None
+
+
+# валідатор та серіалізатор списку будуються один раз, а не на кожен запит
+ContactListAdapter = TypeAdapter(List[ContactResponse])
+
+
+class ContactImportErrorSchema(BaseModel):
+    line: int
+    errors: List[str]
+
+
+class ContactImportReportSchema(BaseModel):
+    imported: int = 0
+    failed: int = 0
+    errors: List[ContactImportErrorSchema] = []
+
+
+class ContactBatchOperationSchema(BaseModel):
+    op: Literal["create", "update", "delete"]
+    id: Optional[int] = Field(None, ge=1)
+    data: Optional[ContactSchema] = None
+
+    @model_validator(mode="after")
+    def check_operation(self):
+        if self.op != "create" and self.id is None:
+            raise ValueError(f"id is required for {self.op}")
+        if self.op == "create" and self.id is not None:
+            raise ValueError("id is not allowed for create")
+        if self.op != "delete" and self.data is None:
+            raise ValueError(f"data is required for {self.op}")
+        return self
+
+
+class ContactBatchRequestSchema(BaseModel):
+    operations: List[ContactBatchOperationSchema] = Field(min_length=1, max_length=1000)
+
+
+class ContactBatchResultSchema(BaseModel):
+    index: int
+    op: str
+    status: int
+    id: Optional[int] = None
+    contact: Optional[ContactSchema] = None
+    detail: Optional[str] = None
+
+
+class ContactBatchResponseSchema(BaseModel):
+    results: List[ContactBatchResultSchema]
+
+
 class UserModel(BaseModel):
     username: str = Field(min_length=3, max_length=20)
     email: str
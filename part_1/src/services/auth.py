@@ -1,29 +1,47 @@
+import hashlib
+import time
 from typing import Optional
 from datetime import datetime, timedelta
-import redis
-import pickle
 
 from jose import JWTError, jwt
 from fastapi.security import OAuth2PasswordBearer
 from fastapi import HTTPException, status, Depends
 from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.database.db import get_db
+from src.database.db import get_async_db
 from src.repository import users as rep_users
 from src.configuration.config import settings
+from src.database.redis_pool import get_redis
+from src.services.hashing import PasswordHasher
+from src.services.lru_cache import TTLLRUCache
+from src.services.metrics import AUTH_CACHE
+from src.services.user_cache import user_cache
 
 
 class Auth:
-    pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    # хеші з cost, відмінним від bcrypt_rounds, перехешовуються при вході
+    pwd_context = CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=settings.bcrypt_rounds,
+        bcrypt__min_rounds=settings.bcrypt_rounds,
+        bcrypt__max_rounds=settings.bcrypt_rounds
+    )
+    password_hasher = PasswordHasher(pwd_context, settings.bcrypt_pool_size, settings.bcrypt_max_queue)
     oauth2_schema = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
-    cache = redis.Redis(host=settings.redis_host, port=settings.redis_port, db=0)
+    # перевірені claims access токенів до їх exp: ключ - sha256 токена,
+    # тож підпис кожного токена перевіряється один раз на воркер
+    token_cache = TTLLRUCache(settings.jwt_cache_size, settings.jwt_cache_max_ttl)
 
-    def verify_password(self, plain_password, hashed_password):
-        return self.pwd_context.verify(plain_password, hashed_password)
+    async def verify_password(self, plain_password, hashed_password):
+        return await self.password_hasher.verify(plain_password, hashed_password)
 
-    def get_password_hash(self, password: str):
-        return self.pwd_context.hash(password)
+    async def verify_and_update_password(self, plain_password, hashed_password):
+        return await self.password_hasher.verify_and_update(plain_password, hashed_password)
+
+    async def get_password_hash(self, password: str):
+        return await self.password_hasher.hash(password)
 
     async def create_access_token(
         self,
@@ -89,10 +107,46 @@ class Auth:
                 detail="Could not validate credentials"
             )
 
+    @staticmethod
+    def _token_hash(token: str) -> bytes:
+        return hashlib.sha256(token.encode("utf-8")).digest()
+
+    def decode_access_token(self, token: str) -> dict:
+        """
+        claims токена з кешу або після перевірки підпису; JWTError, якщо токен невалідний
+        """
+        key = self._token_hash(token)
+        payload = self.token_cache.get(key)
+        AUTH_CACHE.labels("token", "miss" if payload is None else "hit").inc()
+        if payload is None:
+            payload = jwt.decode(
+                token,
+                settings.secret_key,
+                algorithms=[settings.algorithm]
+            )
+            ttl = payload.get("exp", 0) - time.time()
+            if ttl > 0:
+                self.token_cache.set(key, payload, ttl)
+        return payload
+
+    async def is_token_revoked(self, token: str) -> bool:
+        return bool(await get_redis().exists(f"revoked-token:{self._token_hash(token).hex()}"))
+
+    async def revoke_token(self, token: str, expires_at: Optional[float] = None) -> None:
+        """
+        відкликає токен до його exp (перевіряється, якщо jwt_revocation_check увімкнено)
+        """
+        self.token_cache.pop(self._token_hash(token))
+        ttl = int((expires_at or time.time() + settings.jwt_cache_max_ttl) - time.time()) + 1
+        if ttl > 0:
+            await get_redis().set(
+                f"revoked-token:{self._token_hash(token).hex()}", 1, ex=ttl
+            )
+
     async def get_current_user(
         self,
         token: str = Depends(oauth2_schema),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
     ):
         credentials_exception = HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -101,11 +155,7 @@ class Auth:
         )
 
         try:
-            payload = jwt.decode(
-                token,
-                settings.secret_key,
-                algorithms=[settings.algorithm]
-            )
+            payload = self.decode_access_token(token)
             if payload['scope'] == 'access_token':
                 email = payload['sub']
                 if email is None:
@@ -114,15 +164,14 @@ class Auth:
                 raise credentials_exception
         except JWTError:
             raise credentials_exception
-        user = self.cache.get(f"user:{email}")
+        if settings.jwt_revocation_check and await self.is_token_revoked(token):
+            raise credentials_exception
+        user = await user_cache.get(email)
         if user is None:
             user = await rep_users.get_user_by_email(email, db)
             if user is None:
                 raise credentials_exception
-            self.cache.set(f"user:{email}", pickle.dumps(user))
-            self.cache.expire(f"user:{email}", settings.redis_cache_timeout)
-        else:
-            user = pickle.loads(user)
+            await user_cache.set(user, overwrite=False)
         return user
 
     async def create_email_token(self, data: dict):
@@ -153,8 +202,7 @@ class Auth:
             )
             email = payload["sub"]
             return email
-        except JWTError as err:
-            print(err)
+        except JWTError:
             raise HTTPException(
                 status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
                 detail="Invalid token for email verification"
@@ -0,0 +1,160 @@
+import asyncio
+import multiprocessing
+import shutil
+import tempfile
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+import cloudinary
+import cloudinary.uploader
+from fastapi import HTTPException, UploadFile, status
+from PIL import Image, ImageOps, UnidentifiedImageError
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from src.configuration.config import settings
+from src.database.models import User
+from src.repository import users as rep_users
+
+CHUNK_SIZE = 64 * 1024
+
+
+def process_avatar(source: str, target: str, size: int) -> None:
+    """
+    квадратний аватар size x size (обрізка по центру) у JPEG;
+    виконується в окремому процесі, тож не тримає GIL воркера
+    """
+    with Image.open(source) as image:
+        image = ImageOps.exif_transpose(image)
+        image = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+        image.convert("RGB").save(target, "JPEG", quality=85, optimize=True)
+
+
+class AvatarStorage(ABC):
+    @abstractmethod
+    async def save(self, path: Path, user: User) -> str:
+        """
+        зберігає готовий аватар та повертає його URL
+        """
+
+
+class CloudinaryStorage(AvatarStorage):
+
+    def __init__(self):
+        cloudinary.config(
+            cloud_name=settings.cloudinary_name,
+            api_key=settings.cloudinary_api_key,
+            api_secret=settings.cloudinary_api_secret,
+            secure=True
+        )
+
+    async def save(self, path: Path, user: User) -> str:
+        # синхронний клієнт cloudinary - в пулі потоків
+        result = await run_in_threadpool(
+            cloudinary.uploader.upload,
+            str(path),
+            public_id=f'NotesApp/{user.username}',
+            overwrite=True
+        )
+        return result["secure_url"]
+
+
+class LocalStorage(AvatarStorage):
+    """
+    файли в settings.avatar_local_dir, роздаються main.py за avatar_local_url;
+    для розробки та тестів без Cloudinary
+    """
+
+    def __init__(self, root: str, base_url: str):
+        self.root = Path(root)
+        self.base_url = base_url.rstrip("/")
+
+    async def save(self, path: Path, user: User) -> str:
+        name = f"{user.id}.jpg"
+        await run_in_threadpool(self.root.mkdir, parents=True, exist_ok=True)
+        await run_in_threadpool(shutil.move, str(path), str(self.root / name))
+        # версія в URL, щоб клієнти не показували старий аватар з кешу
+        return f"{self.base_url}/{name}?v={time.time_ns()}"
+
+
+def create_storage() -> AvatarStorage:
+    if settings.avatar_storage == "local":
+        return LocalStorage(settings.avatar_local_dir, settings.avatar_local_url)
+    return CloudinaryStorage()
+
+
+class AvatarService:
+    """
+    оновлення аватару без блокування event loop: завантаження пишеться
+    у тимчасовий файл частинами, зміна розміру - в пулі процесів (Pillow),
+    відправка у сховище - в пулі потоків
+    """
+
+    def __init__(self):
+        self._storage: Optional[AvatarStorage] = None
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def storage(self) -> AvatarStorage:
+        if self._storage is None:
+            self._storage = create_storage()
+        return self._storage
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: fork з процесу з event loop, потоками та з'єднаннями
+            # копіює їх стан у дочірній процес
+            self._executor = ProcessPoolExecutor(
+                max_workers=settings.avatar_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    @staticmethod
+    async def _save_upload(file: UploadFile, target: Path) -> None:
+        written = 0
+        # відкриття, запис та закриття файлу - блокуючі виклики, в пулі потоків
+        out = await run_in_threadpool(open, target, "wb")
+        try:
+            while chunk := await file.read(CHUNK_SIZE):
+                written += len(chunk)
+                if written > settings.avatar_max_bytes:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail="Avatar file is too large"
+                    )
+                await run_in_threadpool(out.write, chunk)
+        finally:
+            await run_in_threadpool(out.close)
+
+    async def update(self, user: User, file: UploadFile, db: AsyncSession) -> User:
+        workdir = await run_in_threadpool(tempfile.mkdtemp, prefix="avatar-")
+        try:
+            source = Path(workdir) / "upload"
+            target = Path(workdir) / "avatar.jpg"
+            await self._save_upload(file, source)
+            loop = asyncio.get_running_loop()
+            try:
+                await loop.run_in_executor(
+                    self._get_executor(), process_avatar, str(source), str(target), settings.avatar_size
+                )
+            except (UnidentifiedImageError, OSError, Image.DecompressionBombError):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Invalid image file"
+                )
+            url = await self.storage.save(target, user)
+        finally:
+            await run_in_threadpool(shutil.rmtree, workdir, ignore_errors=True)
+        return await rep_users.update_user_avatar(user, url, db)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+avatar_service = AvatarService()
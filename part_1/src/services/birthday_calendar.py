@@ -0,0 +1,253 @@
+import asyncio
+import json
+import logging
+from datetime import date
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import redis.asyncio as redis
+from redis.asyncio.client import Pipeline
+from redis.exceptions import RedisError, WatchError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.configuration.config import settings
+from src.database.redis_pool import get_redis, close_redis
+from src.database.db import AsyncSessionLocal
+from src.database.models import Contact
+
+logger = logging.getLogger(__name__)
+
+# score = день року * ID_SPAN + id: один діапазон ZRANGEBYSCORE повертає
+# контакти вже впорядкованими за (день року, id), як і SQL запит
+ID_SPAN = 2 ** 32
+
+PAYLOAD_FIELDS = (
+    "id", "first_name", "last_name", "email", "phone_number",
+    "additional_info", "birthday_doy", "user_id"
+)
+
+
+class BirthdayCalendar:
+    """
+    матеріалізований календар днів народження користувача в Redis:
+    birthdays:{user_id} - sorted set id контактів за днем року,
+    birthdays:{user_id}:contacts - hash id -> дані контакту,
+    birthdays:{user_id}:built - маркер, що календар побудований,
+    birthdays:{user_id}:version - лічильник змін контактів: rebuild не
+    записує знімок бази, якщо під час читання контакти змінились
+    """
+
+    @property
+    def redis(self) -> redis.Redis:
+        return get_redis()
+
+    @staticmethod
+    def _keys(user_id: int) -> Tuple[str, str, str]:
+        base = f"birthdays:{user_id}"
+        return base, f"{base}:contacts", f"{base}:built"
+
+    @staticmethod
+    def _version_key(user_id: int) -> str:
+        return f"birthdays:{user_id}:version"
+
+    def _bump_version(self, pipe: Pipeline, user_id: int) -> None:
+        version_key = self._version_key(user_id)
+        pipe.incr(version_key)
+        pipe.expire(version_key, settings.birthday_calendar_ttl)
+
+    @staticmethod
+    def _score(birthday_doy: int, contact_id: int) -> int:
+        return birthday_doy * ID_SPAN + contact_id
+
+    @staticmethod
+    def _dump(contact: Contact) -> str:
+        payload = {field: getattr(contact, field) for field in PAYLOAD_FIELDS}
+        payload["birthday"] = contact.birthday.isoformat()
+        return json.dumps(payload, ensure_ascii=False)
+
+    @staticmethod
+    def _load(raw: bytes) -> Contact:
+        payload = json.loads(raw)
+        payload["birthday"] = date.fromisoformat(payload["birthday"])
+        return Contact(**payload)
+
+    async def add(self, user_id: int, contacts: Sequence[Contact]) -> None:
+        """
+        додає або оновлює контакти в календарі, якщо календар побудований;
+        перевірка built та запис - одна транзакція (WATCH built), тож
+        скинутий паралельно календар не отримує ключів без TTL
+        """
+        if not contacts:
+            return
+        key, contacts_key, built_key = self._keys(user_id)
+        try:
+            async with self.redis.pipeline(transaction=True) as pipe:
+                while True:
+                    try:
+                        await pipe.watch(built_key)
+                        built = await pipe.exists(built_key)
+                        pipe.multi()
+                        # версія змінюється і для непобудованого календаря - його
+                        # можуть саме будувати зі знімка без цих контактів
+                        self._bump_version(pipe, user_id)
+                        if built:
+                            pipe.zadd(key, {
+                                str(contact.id): self._score(contact.birthday_doy, contact.id)
+                                for contact in contacts
+                            })
+                            pipe.hset(contacts_key, mapping={
+                                str(contact.id): self._dump(contact) for contact in contacts
+                            })
+                            pipe.expire(key, settings.birthday_calendar_ttl)
+                            pipe.expire(contacts_key, settings.birthday_calendar_ttl)
+                        await pipe.execute()
+                        return
+                    except WatchError:
+                        # календар побудовано чи скинуто між перевіркою та EXEC
+                        continue
+        except RedisError as err:
+            logger.warning("Birthday calendar update failed for user %s: %s", user_id, err)
+            await self.invalidate(user_id)
+
+    async def remove(self, user_id: int, contact_ids: Iterable[int]) -> None:
+        members = [str(contact_id) for contact_id in contact_ids]
+        if not members:
+            return
+        key, contacts_key, _ = self._keys(user_id)
+        try:
+            async with self.redis.pipeline(transaction=True) as pipe:
+                self._bump_version(pipe, user_id)
+                pipe.zrem(key, *members)
+                pipe.hdel(contacts_key, *members)
+                await pipe.execute()
+        except RedisError as err:
+            logger.warning("Birthday calendar update failed for user %s: %s", user_id, err)
+            await self.invalidate(user_id)
+
+    async def invalidate(self, user_id: int) -> None:
+        """
+        скидає календар, при наступному читанні він буде побудований з бази
+        """
+        try:
+            async with self.redis.pipeline(transaction=True) as pipe:
+                self._bump_version(pipe, user_id)
+                pipe.delete(*self._keys(user_id))
+                await pipe.execute()
+        except RedisError as err:
+            logger.warning("Birthday calendar invalidation failed for user %s: %s", user_id, err)
+
+    async def rebuild(self, user_id: int, db: AsyncSession) -> bool:
+        """
+        будує календар користувача з бази; False, якщо Redis недоступний
+        або контакти змінились під час читання (знімок не записується)
+        """
+        key, contacts_key, built_key = self._keys(user_id)
+        version_key = self._version_key(user_id)
+        try:
+            version = await self.redis.get(version_key)
+        except RedisError as err:
+            logger.warning("Birthday calendar rebuild failed for user %s: %s", user_id, err)
+            return False
+        scores = {}
+        payloads = {}
+        result = await db.stream_scalars(
+            select(Contact).where(Contact.user_id == user_id).
+            execution_options(yield_per=1000)
+        )
+        async for contact in result:
+            scores[str(contact.id)] = self._score(contact.birthday_doy, contact.id)
+            payloads[str(contact.id)] = self._dump(contact)
+        try:
+            async with self.redis.pipeline(transaction=True) as pipe:
+                # WATCH: зміна версії між перевіркою та EXEC скасовує запис
+                await pipe.watch(version_key)
+                if await pipe.get(version_key) != version:
+                    logger.info("Birthday calendar of user %s changed during rebuild", user_id)
+                    return False
+                pipe.multi()
+                pipe.delete(key, contacts_key)
+                if scores:
+                    pipe.zadd(key, scores)
+                    pipe.hset(contacts_key, mapping=payloads)
+                    pipe.expire(key, settings.birthday_calendar_ttl)
+                    pipe.expire(contacts_key, settings.birthday_calendar_ttl)
+                pipe.set(built_key, date.today().isoformat(), ex=settings.birthday_calendar_ttl)
+                await pipe.execute()
+        except WatchError:
+            logger.info("Birthday calendar of user %s changed during rebuild", user_id)
+            return False
+        except RedisError as err:
+            logger.warning("Birthday calendar rebuild failed for user %s: %s", user_id, err)
+            return False
+        return True
+
+    async def upcoming(
+        self,
+        user_id: int,
+        segments: List[Tuple[int, int]],
+        skip: int,
+        limit: int,
+        after: Optional[Tuple[int, int]] = None
+    ) -> Optional[List[Contact]]:
+        """
+        контакти з днем народження в діапазонах днів року segments
+        (див. birthday_window), починаючи після (день року, id) after;
+        None, якщо календар не побудований або Redis недоступний
+        """
+        key, contacts_key, built_key = self._keys(user_id)
+        try:
+            if not await self.redis.exists(built_key):
+                return None
+            members = []
+            for position, (low, high) in enumerate(segments):
+                if len(members) >= limit:
+                    break
+                min_score = self._score(low, 0)
+                max_score = self._score(high, ID_SPAN - 1)
+                if after is not None and position == 0:
+                    min_score = f"({self._score(*after)}"
+                found = await self.redis.zrangebyscore(
+                    key, min_score, max_score, start=skip, num=limit - len(members)
+                )
+                if skip and not found:
+                    skip = max(skip - await self.redis.zcount(key, min_score, max_score), 0)
+                else:
+                    skip = 0
+                members.extend(found)
+            if not members:
+                return []
+            payloads = await self.redis.hmget(contacts_key, members)
+        except RedisError as err:
+            logger.warning("Birthday calendar read failed for user %s: %s", user_id, err)
+            return None
+        if any(raw is None for raw in payloads):
+            # календар розійшовся з даними - перебудуємо при наступному читанні
+            await self.invalidate(user_id)
+            return None
+        return [self._load(raw) for raw in payloads]
+
+
+birthday_calendar = BirthdayCalendar()
+
+
+async def rollover() -> int:
+    """
+    щоденне перебудування календарів всіх користувачів з контактами
+    (запускати до ранкового піку, наприклад з cron):
+    python -m src.services.birthday_calendar
+    """
+    rebuilt = 0
+    try:
+        async with AsyncSessionLocal() as db:
+            user_ids = (await db.scalars(select(Contact.user_id).distinct())).all()
+            for user_id in user_ids:
+                if user_id is not None and await birthday_calendar.rebuild(user_id, db):
+                    rebuilt += 1
+    finally:
+        await close_redis()
+    return rebuilt
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    logger.info("Rebuilt %s birthday calendars", asyncio.run(rollover()))
@@ -0,0 +1,39 @@
+import calendar
+from datetime import date, timedelta
+from typing import List, Tuple
+
+# день року в високосному році: 29 лютого завжди 60, 1 березня завжди 61,
+# тому номер дня народження не залежить від року
+DAYS_IN_YEAR = 366
+FEB_29 = 60
+
+# SQL вираз для збереженого стовпця contacts.birthday_doy, має відповідати day_of_year()
+BIRTHDAY_DOY_SQL = (
+    "(make_date(2000, EXTRACT(MONTH FROM birthday)::int, EXTRACT(DAY FROM birthday)::int)"
+    " - DATE '2000-01-01' + 1)::smallint"
+)
+
+
+def day_of_year(day: date) -> int:
+    return date(2000, day.month, day.day).timetuple().tm_yday
+
+
+def birthday_window(today: date, days: int) -> List[Tuple[int, int]]:
+    """
+    діапазони днів року [від, до] для вікна з days днів починаючи з today,
+    в порядку наступного дня народження; перехід грудень -> січень дає два діапазони
+    """
+    start = day_of_year(today)
+    if days >= DAYS_IN_YEAR:
+        segments = [(start, DAYS_IN_YEAR), (1, start - 1)]
+    else:
+        last_day = today + timedelta(days=days - 1)
+        end = day_of_year(last_day)
+        # в невисокосному році день народження 29 лютого святкують 28 лютого
+        if (last_day.month, last_day.day) == (2, 28) and not calendar.isleap(last_day.year):
+            end = FEB_29
+        if end >= start:
+            segments = [(start, end)]
+        else:
+            segments = [(start, DAYS_IN_YEAR), (1, end)]
+    return [(low, high) for low, high in segments if low <= high]
@@ -0,0 +1,207 @@
+import csv
+import io
+import json
+from typing import AsyncIterator, BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+from starlette.concurrency import iterate_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.configuration.config import settings
+from src.database.db import AsyncSessionLocal
+from src.database.models import User
+from src.repository import contacts as rep_contacts
+from src.schemas.schemas import ContactSchema, ContactImportErrorSchema, ContactImportReportSchema
+
+IMPORT_FORMATS = ("csv", "ndjson")
+
+EXPORT_FIELDS = (
+    "id", "first_name", "last_name", "email", "phone_number", "birthday", "additional_info"
+)
+
+# (номер рядка у файлі, валідний контакт)
+ImportRow = Tuple[int, ContactSchema]
+
+
+def detect_import_format(filename: Optional[str], content_type: Optional[str]) -> Optional[str]:
+    name = (filename or "").lower()
+    content_type = (content_type or "").lower()
+    if name.endswith(".csv") or content_type == "text/csv":
+        return "csv"
+    if name.endswith((".ndjson", ".jsonl")) or content_type in ("application/x-ndjson", "application/jsonl"):
+        return "ndjson"
+    return None
+
+
+def _line_breaks(record: dict) -> int:
+    # зайві поля рядка DictReader складає списком під ключем None
+    values = [
+        item for value in record.values()
+        for item in (value if isinstance(value, list) else [value])
+    ]
+    return sum(value.count("\n") for value in values if value)
+
+
+def _iter_records(file: BinaryIO, file_format: str) -> Iterator[Tuple[int, dict | str]]:
+    """
+    читає файл потоково, рядок за рядком; повертає (номер рядка, запис)
+    або (номер рядка, текст помилки розбору)
+    """
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", errors="replace", newline="")
+    try:
+        if file_format == "csv":
+            reader = csv.DictReader(text)
+            for record in reader:
+                # DictReader пропускає порожні рядки, тож перший рядок запису
+                # рахується від останнього: мінус переноси в полях у лапках
+                yield reader.line_num - _line_breaks(record), record
+        else:
+            for line, raw in enumerate(text, 1):
+                if not raw.strip():
+                    continue
+                try:
+                    record = json.loads(raw)
+                except ValueError as err:
+                    yield line, f"invalid JSON: {err}"
+                    continue
+                if not isinstance(record, dict):
+                    yield line, "JSON object expected"
+                    continue
+                yield line, record
+    finally:
+        # файл належить UploadFile, закриваємо лише обгортку
+        text.detach()
+
+
+def _validation_errors(err: ValidationError) -> List[str]:
+    return [
+        f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}"
+        for error in err.errors()
+    ]
+
+
+def iter_import_chunks(
+    file: BinaryIO,
+    file_format: str,
+    chunk_size: int
+) -> Iterator[Tuple[List[ImportRow], List[ContactImportErrorSchema]]]:
+    """
+    частини файлу по chunk_size записів: валідні контакти та помилки валідації
+    """
+    rows, errors = [], []
+    for line, record in _iter_records(file, file_format):
+        if isinstance(record, str):
+            errors.append(ContactImportErrorSchema(line=line, errors=[record]))
+        else:
+            record.pop(None, None)
+            if not record.get("additional_info"):
+                record["additional_info"] = None
+            try:
+                rows.append((line, ContactSchema.model_validate(record)))
+            except ValidationError as err:
+                errors.append(ContactImportErrorSchema(line=line, errors=_validation_errors(err)))
+        if len(rows) + len(errors) >= chunk_size:
+            yield rows, errors
+            rows, errors = [], []
+    if rows or errors:
+        yield rows, errors
+
+
+async def import_contacts_file(
+    file: BinaryIO,
+    file_format: str,
+    user: User,
+    db: AsyncSession
+) -> ContactImportReportSchema:
+    """
+    потоковий імпорт контактів з CSV/NDJSON: файл розбирається та валідується
+    частинами в пулі потоків, частини завантажуються в базу через COPY
+    """
+    report = ContactImportReportSchema()
+
+    def add_errors(errors: List[ContactImportErrorSchema]) -> None:
+        report.failed += len(errors)
+        room = settings.contacts_import_max_errors - len(report.errors)
+        report.errors.extend(errors[:max(room, 0)])
+
+    async def valid_chunks():
+        chunks = iter_import_chunks(file, file_format, settings.contacts_import_chunk_size)
+        async for rows, errors in iterate_in_threadpool(chunks):
+            add_errors(errors)
+            if rows:
+                yield rows
+
+    async for imported, rejected in rep_contacts.import_contacts(valid_chunks(), user, db):
+        report.imported += imported
+        add_errors([
+            ContactImportErrorSchema(line=line, errors=[reason])
+            for line, reason in rejected
+        ])
+    report.errors.sort(key=lambda error: error.line)
+    return report
+
+
+def _export_ndjson(rows: list) -> str:
+    return "".join(
+        json.dumps(
+            {**row._asdict(), "birthday": row.birthday.isoformat()},
+            ensure_ascii=False
+        ) + "\n"
+        for row in rows
+    )
+
+
+def _export_csv(rows: list) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue()
+
+
+def _vcard_escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace(",", "\\,").replace(";", "\\;").replace("\n", "\\n")
+
+
+def _vcard_line(line: str) -> str:
+    # рядки vCard довші за 75 символів переносяться з пробілом на початку
+    parts = [line[i:i + 75] for i in range(0, len(line), 75)] or [""]
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def _export_vcard(rows: list) -> str:
+    cards = []
+    for row in rows:
+        lines = [
+            "BEGIN:VCARD",
+            "VERSION:3.0",
+            f"N:{_vcard_escape(row.last_name)};{_vcard_escape(row.first_name)};;;",
+            f"FN:{_vcard_escape(row.first_name)} {_vcard_escape(row.last_name)}",
+            f"EMAIL;TYPE=INTERNET:{_vcard_escape(row.email)}",
+            f"TEL:{_vcard_escape(row.phone_number)}",
+            f"BDAY:{row.birthday.isoformat()}",
+        ]
+        if row.additional_info:
+            lines.append(f"NOTE:{_vcard_escape(row.additional_info)}")
+        lines.append("END:VCARD")
+        cards.append("".join(_vcard_line(line) for line in lines))
+    return "".join(cards)
+
+
+# формат: (media type, розширення файлу, заголовок, форматування частини рядків)
+EXPORT_FORMATS: Dict[str, Tuple[str, str, str, Callable[[list], str]]] = {
+    "ndjson": ("application/x-ndjson", "ndjson", "", _export_ndjson),
+    "csv": ("text/csv", "csv", ",".join(EXPORT_FIELDS) + "\r\n", _export_csv),
+    "vcard": ("text/vcard", "vcf", "", _export_vcard),
+}
+
+
+async def export_contacts(user: User, file_format: str) -> AsyncIterator[bytes]:
+    """
+    потоковий експорт всіх контактів користувача; сесія відкривається тут,
+    бо тіло StreamingResponse читається вже після виходу з обробника запиту
+    """
+    _, _, header, render = EXPORT_FORMATS[file_format]
+    if header:
+        yield header.encode("utf-8")
+    async with AsyncSessionLocal() as db:
+        async for rows in rep_contacts.stream_contacts(user, db):
+            yield render(rows).encode("utf-8")
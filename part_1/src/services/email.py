@@ -1,10 +1,10 @@
-from pathlib import Path
-
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig, MessageType
-from fastapi_mail.errors import ConnectionErrors
+from fastapi_mail import ConnectionConfig
 from pydantic import EmailStr
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.repository import outbox as rep_outbox
 from src.services.auth import auth_service
+from src.services.email_templates import TEMPLATE_FOLDER
 from src.configuration.config import settings
 
 
@@ -19,59 +19,53 @@ email_conf = ConnectionConfig(
     MAIL_SSL_TLS=settings.mail_ssl_tls,
     USE_CREDENTIALS=settings.mail_use_credentials,
     VALIDATE_CERTS=settings.mail_validate_certs,
-    TEMPLATE_FOLDER=Path(__file__).parent / 'templates'
+    TEMPLATE_FOLDER=TEMPLATE_FOLDER
 )
 
 
-async def send_verificatoin_email(
+# листи не надсилаються в запиті: запис в email_outbox, надсилає
+# окремий процес python -m src.services.email_worker
+VERIFICATION_TEMPLATE = "email_verification_template.html"
+PASSWORD_RESET_TEMPLATE = "email_password_reset_template.html"
+
+
+async def enqueue_verification_email(
     email: EmailStr,
     username: str,
-    host: str
+    host: str,
+    db: AsyncSession
 ):
-    try:
-        # токен для верифікації email
-        token_verification = await auth_service.create_email_token({"sub": email})
-        message = MessageSchema(
-            subject="Congirm your email",
-            recipients=[email],
-            template_body={
-                "host": host,
-                "username": username,
-                "token": token_verification
-            },
-            subtype=MessageType.html
-        )
-        fm = FastMail(email_conf)
-        await fm.send_message(
-            message,
-            template_name="email_verification_template.html"
-        )
-    except ConnectionError as err:
-        print(err)
+    # токен для верифікації email
+    token_verification = await auth_service.create_email_token({"sub": email})
+    await rep_outbox.enqueue_email(
+        recipient=email,
+        subject="Congirm your email",
+        template_name=VERIFICATION_TEMPLATE,
+        template_body={
+            "host": str(host),
+            "username": username,
+            "token": token_verification
+        },
+        db=db
+    )
 
 
-async def send_reset_password_email(
+async def enqueue_reset_password_email(
     email: EmailStr,
     username: str,
-    host: str
+    host: str,
+    db: AsyncSession
 ):
-    try:
-        # токен для скиадння паролю
-        passwortd_reset_token = await auth_service.create_password_reset_token({"sub": email})
-        message = MessageSchema(
-            subject="Password reset",
-            recipients=[email],
-            template_body={
-                "host": host,
-                "username": username,
-                "token": passwortd_reset_token
-            },
-            subtype=MessageType.html
-        )
-        fm = FastMail(email_conf)
-        await fm.send_message(
-            message,
-            template_name="email_password_reset_template.html"
-        )
-    except ConnectionError as err:
-        print(err)
+    # токен для скиадння паролю
+    passwortd_reset_token = await auth_service.create_password_reset_token({"sub": email})
+    await rep_outbox.enqueue_email(
+        recipient=email,
+        subject="Password reset",
+        template_name=PASSWORD_RESET_TEMPLATE,
+        template_body={
+            "host": str(host),
+            "username": username,
+            "token": passwortd_reset_token
+        },
+        db=db
+    )
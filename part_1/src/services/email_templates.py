@@ -0,0 +1,114 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from jinja2 import Environment, FileSystemLoader, Template, nodes, select_autoescape
+from markupsafe import escape
+
+from src.configuration.config import settings
+
+TEMPLATE_FOLDER = Path(__file__).parent / 'templates'
+
+# частини шаблону: статичний текст (str) або ім'я змінної (nodes.Name)
+StaticParts = List[str | nodes.Name]
+
+
+def static_parts(environment: Environment, source: str) -> Optional[StaticParts]:
+    """
+    шаблон, що лише підставляє змінні ({{ name }} без фільтрів, умов
+    та циклів), розбирається на статичні частини та імена змінних;
+    для інших шаблонів - None
+    """
+    parts: StaticParts = []
+    for node in environment.parse(source).body:
+        if not isinstance(node, nodes.Output):
+            return None
+        for child in node.nodes:
+            if isinstance(child, nodes.TemplateData):
+                parts.append(child.data)
+            elif isinstance(child, nodes.Name) and child.ctx == "load":
+                parts.append(child)
+            else:
+                return None
+    return parts
+
+
+class EmailTemplates:
+    """
+    шаблони листів компілюються один раз при імпорті; шаблони з простою
+    підстановкою змінних рендеряться склеюванням закешованих статичних
+    частин без виконання Jinja; масовий рендер (хвилі реєстрацій,
+    нагадування про дні народження) виконується в пулі потоків, щоб не
+    блокувати event loop
+    """
+
+    def __init__(self, folder: Path = TEMPLATE_FOLDER, workers: int = settings.email_render_workers):
+        self.environment = Environment(
+            loader=FileSystemLoader(folder),
+            autoescape=select_autoescape(["html", "xml"]),
+            auto_reload=False,
+            cache_size=-1
+        )
+        self.templates: Dict[str, Template] = {}
+        self.static: Dict[str, StaticParts] = {}
+        for name in self.environment.list_templates():
+            self.templates[name] = self.environment.get_template(name)
+            source, _, _ = self.environment.loader.get_source(self.environment, name)
+            parts = static_parts(self.environment, source)
+            if parts is not None:
+                self.static[name] = parts
+        self.workers = workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def render(self, name: str, context: dict) -> str:
+        parts = self.static.get(name)
+        if parts is None:
+            return self.templates[name].render(**context)
+        # як і Jinja з autoescape: відсутня змінна - порожній рядок, значення екрануються
+        return "".join(
+            part if isinstance(part, str)
+            else (str(escape(context[part.name])) if part.name in context else "")
+            for part in parts
+        )
+
+    def render_many(self, items: Sequence[Tuple[str, dict]]) -> List[str | Exception]:
+        """
+        помилка рендеру листа (невідомий шаблон, некоректні змінні)
+        повертається на його місці і не зриває решту пачки
+        """
+        bodies: List[str | Exception] = []
+        for name, context in items:
+            try:
+                bodies.append(self.render(name, context))
+            except Exception as err:
+                bodies.append(err)
+        return bodies
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="email-render")
+        return self._executor
+
+    async def render_bulk(self, items: Sequence[Tuple[str, dict]]) -> List[str | Exception]:
+        """
+        тіла листів (або помилки рендеру, див. render_many) для пар
+        (шаблон, змінні) в тому ж порядку; рендер частинами в пулі потоків
+        """
+        if not items:
+            return []
+        loop = asyncio.get_running_loop()
+        size = max(1, -(-len(items) // self.workers))
+        chunks = [items[i:i + size] for i in range(0, len(items), size)]
+        rendered = await asyncio.gather(*(
+            loop.run_in_executor(self._get_executor(), self.render_many, chunk) for chunk in chunks
+        ))
+        return [body for chunk in rendered for body in chunk]
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+email_templates = EmailTemplates()
@@ -0,0 +1,169 @@
+import asyncio
+import logging
+import random
+from email.message import EmailMessage
+from email.utils import formataddr, make_msgid
+from typing import Optional
+
+import aiosmtplib
+from prometheus_client import start_http_server
+
+from src.configuration.config import settings
+from src.database.db import AsyncSessionLocal
+from src.database.models import EmailOutbox
+from src.repository import outbox as rep_outbox
+from src.services.email import email_conf
+from src.services.email_templates import email_templates
+from src.services.metrics import EMAIL_BATCHES, EMAIL_OUTBOX, EMAIL_WORKER_ERRORS, MULTIPROCESS
+
+logger = logging.getLogger(__name__)
+
+
+class EmailWorker:
+    """
+    окремий процес, що надсилає листи з email_outbox пачками через одне
+    SMTP з'єднання (тіла пачки рендеряться разом, див. email_templates);
+    невдалі листи повторюються з експоненційною затримкою; лічильники -
+    email_outbox_* в /metrics на порту email_worker_metrics_port
+
+    запуск з part_1: python -m src.services.email_worker
+    локальний SMTP для перевірки: python -m aiosmtpd -n -l localhost:1025
+    (MAIL_SERVER=localhost, MAIL_PORT=1025, без TLS та облікових даних)
+    """
+
+    def __init__(self):
+        self.smtp: Optional[aiosmtplib.SMTP] = None
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        if self.smtp is None or not self.smtp.is_connected:
+            self.smtp = aiosmtplib.SMTP(
+                hostname=settings.mail_server,
+                port=settings.mail_port,
+                username=settings.mail_username if settings.mail_use_credentials else None,
+                password=settings.mail_password if settings.mail_use_credentials else None,
+                use_tls=settings.mail_ssl_tls,
+                start_tls=settings.mail_start_tls,
+                validate_certs=settings.mail_validate_certs,
+                timeout=settings.mail_timeout
+            )
+            await self.smtp.connect()
+        return self.smtp
+
+    async def close(self) -> None:
+        if self.smtp is not None and self.smtp.is_connected:
+            try:
+                await self.smtp.quit()
+            except aiosmtplib.SMTPException:
+                self.smtp.close()
+        self.smtp = None
+
+    @staticmethod
+    def build(message: EmailOutbox, html: str) -> EmailMessage:
+        email = EmailMessage()
+        email["From"] = formataddr((email_conf.MAIL_FROM_NAME, email_conf.MAIL_FROM))
+        email["To"] = message.recipient
+        email["Subject"] = message.subject
+        email["Message-ID"] = make_msgid()
+        email.set_content(html, subtype="html")
+        return email
+
+    async def send(self, email: EmailMessage) -> None:
+        smtp = await self._connect()
+        try:
+            await smtp.send_message(email)
+        except aiosmtplib.SMTPServerDisconnected:
+            # сервер закрив з'єднання між пачками - одне перепідключення
+            self.smtp = None
+            smtp = await self._connect()
+            await smtp.send_message(email)
+
+    @staticmethod
+    def retry_in(attempts: int) -> Optional[float]:
+        if attempts >= settings.email_outbox_max_attempts:
+            return None
+        delay = min(settings.email_outbox_backoff_base * 2 ** (attempts - 1), settings.email_outbox_backoff_max)
+        # розкид, щоб повтори після збою SMTP не приходили одночасно
+        return delay * random.uniform(0.8, 1.2)
+
+    async def run_once(self) -> int:
+        """
+        одна пачка листів; повертає кількість оброблених
+        """
+        async with AsyncSessionLocal() as db:
+            messages = await rep_outbox.claim_emails(
+                settings.email_outbox_batch_size, settings.email_outbox_lease, db
+            )
+            if not messages:
+                return 0
+            bodies = await email_templates.render_bulk(
+                [(message.template_name, message.template_body) for message in messages]
+            )
+            sent_ids = []
+            for index, (message, html) in enumerate(zip(messages, bodies)):
+                if isinstance(html, Exception):
+                    # повтор не допоможе - без цього лист брався б знову після кожного lease
+                    EMAIL_OUTBOX.labels("failed").inc()
+                    logger.error("Email %s to %s cannot be rendered: %r", message.id, message.recipient, html)
+                    await rep_outbox.mark_failed(message, f"render failed: {html!r}", None, db)
+                    continue
+                try:
+                    await self.send(self.build(message, html))
+                except (aiosmtplib.SMTPException, OSError) as err:
+                    # attempts в базі збільшить mark_failed
+                    retry_in = self.retry_in(message.attempts + 1)
+                    if retry_in is None:
+                        EMAIL_OUTBOX.labels("failed").inc()
+                        logger.error("Email %s to %s failed permanently: %s", message.id, message.recipient, err)
+                    else:
+                        EMAIL_OUTBOX.labels("retried").inc()
+                        logger.warning("Email %s to %s failed, retry in %.0fs: %s",
+                                       message.id, message.recipient, retry_in, err)
+                    await rep_outbox.mark_failed(message, str(err), retry_in, db)
+                    if isinstance(err, (aiosmtplib.SMTPConnectError, aiosmtplib.SMTPServerDisconnected, OSError)):
+                        # SMTP недоступний - решту пачки не надсилали, повертаємо
+                        # її в чергу без зарахованої спроби
+                        released = [rest.id for rest in messages[index + 1:]]
+                        await rep_outbox.release_emails(released, db)
+                        EMAIL_OUTBOX.labels("released").inc(len(released))
+                        await self.close()
+                        break
+                else:
+                    sent_ids.append(message.id)
+            await rep_outbox.mark_sent(sent_ids, db)
+        EMAIL_OUTBOX.labels("sent").inc(len(sent_ids))
+        EMAIL_BATCHES.inc()
+        logger.info("Batch of %s emails: sent %s", len(messages), len(sent_ids))
+        return len(messages)
+
+    async def run(self) -> None:
+        try:
+            while True:
+                try:
+                    processed = await self.run_once()
+                except Exception:
+                    # помилка бази чи рендеру не зупиняє воркер: взяті листи
+                    # повернуться в чергу після lease
+                    EMAIL_WORKER_ERRORS.inc()
+                    logger.exception("Email worker iteration failed")
+                    await self.close()
+                    await asyncio.sleep(settings.email_outbox_poll_interval)
+                    continue
+                if processed < settings.email_outbox_batch_size:
+                    if processed == 0:
+                        # черга порожня - не тримаємо SMTP з'єднання
+                        await self.close()
+                    await asyncio.sleep(settings.email_outbox_poll_interval)
+        finally:
+            await self.close()
+            email_templates.shutdown()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    # з PROMETHEUS_MULTIPROC_DIR лічильники воркера віддає /metrics API
+    if settings.email_worker_metrics_port and not MULTIPROCESS:
+        start_http_server(settings.email_worker_metrics_port)
+    try:
+        asyncio.run(EmailWorker().run())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,173 @@
+"""
+метрики Prometheus, endpoint /metrics
+
+кілька воркерів uvicorn: перед запуском задати змінну оточення
+PROMETHEUS_MULTIPROC_DIR (порожній каталог, очищується перед стартом) -
+кожен процес пише значення у файли, а /metrics агрегує їх
+"""
+import os
+import time
+
+from fastapi import Request, Response
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+REQUESTS = Counter(
+    "http_requests_total",
+    "HTTP requests by route template and status",
+    ["method", "route", "status"]
+)
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route"]
+)
+IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "HTTP requests being processed",
+    multiprocess_mode="livesum"
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out_connections",
+    "Connections checked out from the SQLAlchemy pool",
+    ["engine"],
+    multiprocess_mode="livesum"
+)
+DB_POOL_OVERFLOW = Gauge(
+    "db_pool_overflow_connections",
+    "Connections opened above pool_size",
+    ["engine"],
+    multiprocess_mode="livesum"
+)
+REDIS_LATENCY = Histogram(
+    "redis_command_duration_seconds",
+    "Redis command latency",
+    ["command"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+)
+# hit ratio: sum by (cache) (rate(...{result!~"miss|error"})) / sum by (cache) (rate(...));
+# error - Redis недоступний, дані читаються з бази
+AUTH_CACHE = Counter(
+    "auth_cache_lookups_total",
+    "Auth cache lookups (token claims, users) by result",
+    ["cache", "result"]
+)
+RESPONSE_CACHE = Counter(
+    "response_cache_lookups_total",
+    "Contacts response cache lookups by result (hit, miss, error)",
+    ["result"]
+)
+RATE_LIMIT_REJECTIONS = Counter(
+    "rate_limit_rejections_total",
+    "Requests rejected by the rate limiter",
+    ["route"]
+)
+# воркер листів (окремий процес): пропускна здатність -
+# rate(email_outbox_messages_total{result="sent"}[5m])
+EMAIL_OUTBOX = Counter(
+    "email_outbox_messages_total",
+    "Outbox emails processed by the worker by result (sent, retried, failed, released)",
+    ["result"]
+)
+EMAIL_BATCHES = Counter(
+    "email_outbox_batches_total",
+    "Outbox batches claimed by the worker"
+)
+EMAIL_WORKER_ERRORS = Counter(
+    "email_worker_errors_total",
+    "Email worker iterations that failed with an exception"
+)
+# source: redis - рішення Lua скрипта, local - вичерпаний локальний bucket,
+# fallback - Redis недоступний, рішення за локальним bucket
+RATE_LIMIT_CHECKS = Counter(
+    "rate_limit_checks_total",
+    "Rate limiter decisions by route and source",
+    ["route", "source"]
+)
+
+
+def instrument_engine(engine: Engine, name: str) -> None:
+    """
+    gauge з'єднань пулу: видані та понад pool_size; для AsyncEngine
+    передається async_engine.sync_engine
+    """
+    pool = engine.pool
+
+    def overflow() -> int:
+        return max(pool.overflow(), 0) if hasattr(pool, "overflow") else 0
+
+    @event.listens_for(engine, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        DB_POOL_CHECKED_OUT.labels(name).inc()
+        DB_POOL_OVERFLOW.labels(name).set(overflow())
+
+    @event.listens_for(engine, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        DB_POOL_CHECKED_OUT.labels(name).dec()
+        DB_POOL_OVERFLOW.labels(name).set(overflow())
+
+
+def observe_redis(command: str, started: float) -> None:
+    REDIS_LATENCY.labels(command).observe(time.perf_counter() - started)
+
+
+class MetricsMiddleware:
+    """
+    кількість та тривалість запитів; мітка route - шаблон шляху
+    (/api/contacts/{contact_id}), а не сам шлях, щоб не плодити серії
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            IN_FLIGHT.dec()
+            route = scope.get("route")
+            template = getattr(route, "path_format", None) or getattr(route, "path", None) or "unmatched"
+            REQUESTS.labels(scope["method"], template, str(status_code)).inc()
+            REQUEST_LATENCY.labels(scope["method"], template).observe(time.perf_counter() - started)
+
+
+def metrics_endpoint(request: Request) -> Response:
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+
+
+def mark_process_dead() -> None:
+    # прибирає live gauge процесу, що завершується
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(os.getpid())
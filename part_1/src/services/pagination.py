@@ -0,0 +1,30 @@
+import base64
+import json
+from typing import Any, List
+
+
+def encode_cursor(*values: Any) -> str:
+    """
+    непрозорий (opaque) курсор для keyset пагінації:
+    значення ключа сортування останнього запису сторінки в base64
+    """
+    raw = json.dumps(values, separators=(",", ":"), ensure_ascii=False)
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(cursor: str, *types: type) -> List[Any]:
+    """
+    розбирає курсор; ValueError, якщо курсор пошкоджений
+    або не відповідає ключу сортування з полів типів types
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError) as err:
+        raise ValueError("Invalid cursor") from err
+    if not isinstance(values, list) or len(values) != len(types):
+        raise ValueError("Invalid cursor")
+    for value, type_ in zip(values, types):
+        if not isinstance(value, type_) or isinstance(value, bool):
+            raise ValueError("Invalid cursor")
+    return values
@@ -0,0 +1,234 @@
+import logging
+import math
+import time
+from typing import Dict, NamedTuple, Optional
+
+import redis.asyncio as redis
+from redis.exceptions import RedisError
+from fastapi import Depends, HTTPException, Request, status
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.configuration.config import settings
+from src.database.models import User
+from src.database.redis_pool import get_redis
+from src.services.auth import current_active_user
+from src.services.lru_cache import TTLLRUCache
+from src.services.metrics import RATE_LIMIT_CHECKS, RATE_LIMIT_REJECTIONS
+
+logger = logging.getLogger(__name__)
+
+# token bucket за один виклик: час береться з Redis (TIME), тож всі воркери
+# рахують однаково; ключ живе, поки bucket не наповниться повністю
+TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) * 1000 + math.floor(tonumber(clock[2]) / 1000)
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1])
+local ts = tonumber(state[2])
+if tokens == nil or ts == nil then
+    tokens = capacity
+    ts = now
+end
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local retry_after = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    retry_after = math.ceil((cost - tokens) / rate)
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate))
+return {allowed, math.floor(tokens), retry_after, math.ceil((capacity - tokens) / rate)}
+"""
+
+# ключ scope, з якого RateLimitHeadersMiddleware бере заголовки відповіді
+SCOPE_KEY = "rate_limit"
+
+
+class Quota(NamedTuple):
+    times: int
+    seconds: float
+
+    @property
+    def rate(self) -> float:
+        # токенів за мілісекунду
+        return self.times / (self.seconds * 1000)
+
+
+def parse_quota(value: str) -> Quota:
+    """
+    квота у форматі "кількість/секунди", наприклад "10/60"
+    """
+    times, _, seconds = value.partition("/")
+    quota = Quota(int(times), float(seconds or 1))
+    if quota.times <= 0 or quota.seconds <= 0:
+        raise ValueError(f"Invalid rate limit quota: {value!r}")
+    return quota
+
+
+class RateLimitResult(NamedTuple):
+    allowed: bool
+    limit: int
+    remaining: int
+    # мс до наступного дозволеного запиту та до повного наповнення bucket
+    retry_after: int
+    reset: int
+
+    def headers(self) -> Dict[str, str]:
+        return {
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Remaining": str(self.remaining),
+            "X-RateLimit-Reset": str(math.ceil(self.reset / 1000)),
+        }
+
+
+class LocalBucket:
+    """
+    наближена копія bucket в пам'яті воркера: після кожної відповіді Redis
+    містить залишок з Redis, між ними поповнюється з тією ж швидкістю
+    """
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, capacity: int):
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def refill(self, quota: Quota) -> None:
+        now = time.monotonic()
+        self.tokens = min(quota.times, self.tokens + (now - self.updated) * 1000 * quota.rate)
+        self.updated = now
+
+    def result(self, quota: Quota, allowed: bool) -> RateLimitResult:
+        missing = quota.times - self.tokens
+        return RateLimitResult(
+            allowed=allowed,
+            limit=quota.times,
+            remaining=int(self.tokens),
+            retry_after=0 if allowed else math.ceil((1 - self.tokens) / quota.rate),
+            reset=math.ceil(missing / quota.rate)
+        )
+
+
+class RateLimiter:
+    """
+    обмеження запитів token bucket: спільний стан в Redis (Lua скрипт -
+    один round trip), квоти за маршрутом та користувачем з Settings;
+    локальний bucket відхиляє запити гарячих ключів без звернення до Redis
+    і приймає рішення сам, якщо Redis недоступний
+    """
+
+    @property
+    def redis(self) -> redis.Redis:
+        return get_redis()
+
+    def __init__(self):
+        self.default_quota = parse_quota(settings.rate_limit_default)
+        self.route_quotas = {
+            route: parse_quota(value) for route, value in settings.rate_limit_routes.items()
+        }
+        self.user_quotas = {
+            email: parse_quota(value) for email, value in settings.rate_limit_users.items()
+        }
+        self.local = TTLLRUCache(settings.rate_limit_local_size, 3600)
+        self._script = None
+
+    def quota(self, route: str, user: User) -> Quota:
+        return self.user_quotas.get(user.email) or self.route_quotas.get(route) or self.default_quota
+
+    @staticmethod
+    def _key(route: str, user: User) -> str:
+        return f"rate-limit:{route}:{user.id}"
+
+    def _local_bucket(self, key: str, quota: Quota) -> LocalBucket:
+        bucket = self.local.get(key)
+        if bucket is None:
+            bucket = LocalBucket(quota.times)
+        # запис без звернень старший за повне наповнення - bucket знову повний
+        self.local.set(key, bucket, quota.seconds)
+        bucket.refill(quota)
+        return bucket
+
+    async def _hit_redis(self, key: str, quota: Quota) -> RateLimitResult:
+        if self._script is None:
+            self._script = self.redis.register_script(TOKEN_BUCKET_LUA)
+        allowed, remaining, retry_after, reset = await self._script(
+            keys=[key], args=[quota.times, quota.rate, 1], client=self.redis
+        )
+        return RateLimitResult(bool(allowed), quota.times, remaining, retry_after, reset)
+
+    async def hit(self, route: str, user: User) -> RateLimitResult:
+        quota = self.quota(route, user)
+        key = self._key(route, user)
+        bucket = self._local_bucket(key, quota)
+        if bucket.tokens < 1:
+            # локальна копія вичерпана - Redis відповів би так само
+            RATE_LIMIT_CHECKS.labels(route, "local").inc()
+            return bucket.result(quota, allowed=False)
+        try:
+            result = await self._hit_redis(key, quota)
+        except RedisError as err:
+            logger.warning("Rate limiter falls back to local buckets: %s", err)
+            RATE_LIMIT_CHECKS.labels(route, "fallback").inc()
+            bucket.tokens -= 1
+            return bucket.result(quota, allowed=True)
+        RATE_LIMIT_CHECKS.labels(route, "redis").inc()
+        bucket.tokens = result.remaining
+        return result
+
+    async def check(self, route: str, user: User, request: Request) -> None:
+        if not settings.rate_limit_enabled:
+            return
+        result = await self.hit(route, user)
+        headers = result.headers()
+        if not result.allowed:
+            RATE_LIMIT_REJECTIONS.labels(route).inc()
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests",
+                headers={**headers, "Retry-After": str(math.ceil(result.retry_after / 1000))}
+            )
+        request.scope[SCOPE_KEY] = headers
+
+
+rate_limiter = RateLimiter()
+
+
+def rate_limit(route: str):
+    """
+    залежність маршруту: dependencies=[Depends(rate_limit("contacts:read"))]
+    """
+    async def dependency(request: Request, user: User = Depends(current_active_user)) -> None:
+        await rate_limiter.check(route, user, request)
+    return dependency
+
+
+class RateLimitHeadersMiddleware:
+    """
+    додає X-RateLimit-* до відповіді: обробники контактів повертають
+    Response напряму, тож заголовки залежності інакше губляться
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_headers(message: Message) -> None:
+            headers: Optional[Dict[str, str]] = scope.get(SCOPE_KEY)
+            if message["type"] == "http.response.start" and headers:
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [
+                    (name.lower().encode("latin-1"), value.encode("latin-1"))
+                    for name, value in headers.items()
+                ]
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
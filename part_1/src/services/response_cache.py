@@ -0,0 +1,146 @@
+import hashlib
+import json
+import logging
+import time
+from typing import Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+import redis.asyncio as redis
+from redis.exceptions import RedisError
+from fastapi import Request, Response, status
+
+from src.configuration.config import settings
+from src.database.redis_pool import get_redis
+from src.services.metrics import RESPONSE_CACHE
+
+logger = logging.getLogger(__name__)
+
+# тіло відповіді (JSON) та додаткові заголовки
+CachedBody = Tuple[bytes, Dict[str, str]]
+
+
+class ResponseCache:
+    """
+    кеш відповідей на читання контактів: ключ містить версію контактів
+    користувача, тож будь-яка зміна (invalidate) робить всі його записи
+    недосяжними, а старі записи видаляються Redis по TTL;
+    та ж версія використовується для ETag відповідей
+    """
+
+    @property
+    def redis(self) -> redis.Redis:
+        return get_redis()
+
+    @staticmethod
+    def _version_key(user_id: int) -> str:
+        return f"contacts-version:{user_id}"
+
+    async def version(self, user_id: int) -> Optional[str]:
+        """
+        поточна версія контактів користувача; початкове значення - час в нс,
+        тож після втрати ключа в Redis старі версії не повторяться
+        """
+        key = self._version_key(user_id)
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.set(key, time.time_ns(), nx=True)
+                pipe.get(key)
+                _, version = await pipe.execute()
+        except RedisError as err:
+            logger.warning("Response cache is unavailable: %s", err)
+            return None
+        return version.decode()
+
+    async def invalidate(self, user_id: int) -> None:
+        key = self._version_key(user_id)
+        try:
+            async with self.redis.pipeline(transaction=True) as pipe:
+                pipe.set(key, time.time_ns(), nx=True)
+                pipe.incr(key)
+                await pipe.execute()
+        except RedisError as err:
+            logger.warning("Response cache invalidation failed for user %s: %s", user_id, err)
+
+    @staticmethod
+    def key(user_id: int, version: str, route: str, params: Iterable[Tuple[str, str]]) -> str:
+        digest = hashlib.sha1(
+            json.dumps(sorted(params), ensure_ascii=False).encode("utf-8")
+        ).hexdigest()
+        return f"contacts-cache:{user_id}:{version}:{route}:{digest}"
+
+    async def get(self, key: str) -> Optional[CachedBody]:
+        try:
+            cached = await self.redis.hgetall(key)
+        except RedisError as err:
+            logger.warning("Response cache read failed: %s", err)
+            RESPONSE_CACHE.labels("error").inc()
+            return None
+        if not cached:
+            RESPONSE_CACHE.labels("miss").inc()
+            return None
+        RESPONSE_CACHE.labels("hit").inc()
+        return cached[b"body"], json.loads(cached[b"headers"])
+
+    async def set(self, key: str, body: bytes, headers: Dict[str, str]) -> None:
+        try:
+            async with self.redis.pipeline(transaction=True) as pipe:
+                pipe.hset(key, mapping={"body": body, "headers": json.dumps(headers)})
+                pipe.expire(key, settings.response_cache_timeout)
+                await pipe.execute()
+        except RedisError as err:
+            logger.warning("Response cache write failed: %s", err)
+
+    @staticmethod
+    def etag(key: str) -> str:
+        # сильний ETag: тіло однозначно визначається версією контактів та параметрами
+        return '"' + hashlib.sha1(key.encode("utf-8")).hexdigest() + '"'
+
+    @staticmethod
+    def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+        if not if_none_match:
+            return False
+        # для If-None-Match діє слабке порівняння: префікс W/ ігнорується
+        return any(
+            tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(",")
+        )
+
+    async def cached_json(
+        self,
+        request: Request,
+        user_id: int,
+        route: str,
+        params: Iterable[Tuple[str, str]],
+        produce: Callable[[], Awaitable[CachedBody]]
+    ) -> Response:
+        """
+        JSON відповідь з кешу або з produce(); 304 Not Modified без читання
+        даних, якщо If-None-Match збігається з ETag поточної версії;
+        винятки produce (наприклад 404) не кешуються
+        """
+        version = await self.version(user_id)
+        key = None
+        headers = {}
+        if version is not None:
+            key = self.key(user_id, version, route, params)
+            headers["ETag"] = self.etag(key)
+            if self.etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+                return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+            if settings.response_cache_enabled:
+                cached = await self.get(key)
+                if cached is not None:
+                    body, cached_headers = cached
+                    return Response(
+                        content=body,
+                        media_type="application/json",
+                        headers={**cached_headers, **headers}
+                    )
+        body, produced_headers = await produce()
+        if key is not None and settings.response_cache_enabled:
+            await self.set(key, body, produced_headers)
+        return Response(
+            content=body,
+            media_type="application/json",
+            headers={**produced_headers, **headers}
+        )
+
+
+response_cache = ResponseCache()
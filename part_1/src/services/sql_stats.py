@@ -0,0 +1,135 @@
+"""
+облік SQL запитів поточного HTTP запиту: кількість, час в базі,
+повтори однакових запитів (ознака N+1); повільні запити логуються
+без значень параметрів
+"""
+import logging
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Any, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.configuration.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class SQLStats:
+    __slots__ = ("queries", "duration", "statements", "path")
+
+    def __init__(self, path: str = ""):
+        self.queries = 0
+        self.duration = 0.0
+        self.statements: Counter = Counter()
+        self.path = path
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.duration * 1000:.1f};desc="{self.queries} queries"'
+
+
+_current: ContextVar[Optional[SQLStats]] = ContextVar("sql_stats", default=None)
+
+
+def current_stats() -> Optional[SQLStats]:
+    return _current.get()
+
+
+def redact(parameters: Any) -> Any:
+    """
+    типи замість значень параметрів (email, паролі, токени не потрапляють в лог)
+    """
+    if isinstance(parameters, dict):
+        return {name: type(value).__name__ for name, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (dict, list, tuple)):
+            return f"<{len(parameters)} parameter sets>"
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration = time.perf_counter() - conn.info["query_started"].pop()
+    if duration * 1000 >= settings.sql_slow_query_ms:
+        logger.warning(
+            "Slow query %.1f ms: %s; parameters: %s",
+            duration * 1000, statement, redact(parameters)
+        )
+    stats = _current.get()
+    if stats is None:
+        return
+    stats.queries += 1
+    stats.duration += duration
+    stats.statements[statement] += 1
+    if stats.statements[statement] == settings.sql_repeated_query_threshold:
+        logger.warning(
+            "Query repeated %s times within %s (N+1?): %s",
+            settings.sql_repeated_query_threshold, stats.path, statement
+        )
+
+
+def _handle_error(exception_context):
+    # запит з помилкою не доходить до after_cursor_execute
+    started = exception_context.connection.info.get("query_started") if exception_context.connection else None
+    if started:
+        started.pop()
+
+
+def instrument_engine(engine: Engine) -> None:
+    """
+    для AsyncEngine передається async_engine.sync_engine; події виконуються
+    в greenlet SQLAlchemy, який успадковує contextvars задачі запиту
+    """
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+class SQLStatsMiddleware:
+    """
+    рахує запити до бази в межах HTTP запиту та додає заголовок
+    Server-Timing: db;dur=<мс>;desc="<n> queries"; відповіді без
+    Content-Length (StreamingResponse) читають базу вже після заголовків,
+    тож для них заголовка немає - підсумок лише в лозі після відправки тіла
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = SQLStats(scope["path"])
+        token = _current.set(stats)
+
+        streamed = False
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal streamed
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                streamed = not any(name.lower() == b"content-length" for name, _ in headers)
+                if not streamed:
+                    message["headers"] = headers + [
+                        (b"server-timing", stats.server_timing().encode("latin-1"))
+                    ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            logger.log(
+                logging.INFO if streamed else logging.DEBUG,
+                "%s %s: %s queries, %.1f ms in database",
+                scope["method"], scope["path"], stats.queries, stats.duration * 1000
+            )
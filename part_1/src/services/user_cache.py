@@ -0,0 +1,149 @@
+import asyncio
+import logging
+import os
+import uuid
+from typing import Optional
+
+import redis.asyncio as redis
+from redis.exceptions import RedisError
+
+from src.configuration.config import settings
+from src.database.redis_pool import get_redis
+from src.database.models import User
+from src.schemas.schemas import UserDbModel
+from src.services.lru_cache import TTLLRUCache
+from src.services.metrics import AUTH_CACHE
+
+logger = logging.getLogger(__name__)
+
+
+class UserCache:
+    """
+    дворівневий кеш користувачів для get_current_user: LRU в пам'яті процесу
+    перед Redis; зберігаються лише поля UserDbModel (JSON), без пароля
+    та без pickle ORM об'єкта; зміни користувача публікуються в канал
+    CHANNEL, і кожен воркер видаляє свою локальну копію
+    """
+    CHANNEL = "user-cache:invalidate"
+
+    @property
+    def redis(self) -> redis.Redis:
+        return get_redis()
+
+    def __init__(self):
+        self._instance_pid: Optional[int] = None
+        self._instance_id = ""
+        self.local = TTLLRUCache(settings.user_cache_local_size, settings.user_cache_local_ttl)
+
+    @property
+    def instance_id(self) -> str:
+        """
+        id процесу - щоб не обробляти власні повідомлення; створюється в
+        самому процесі, бо воркери, форкнуті з master (--preload), інакше
+        отримали б однаковий id і відкидали б повідомлення одне одного
+        """
+        pid = os.getpid()
+        if self._instance_pid != pid:
+            self._instance_pid = pid
+            self._instance_id = f"{pid}-{uuid.uuid4().hex}"
+        return self._instance_id
+
+    @staticmethod
+    def _key(email: str) -> str:
+        return f"user:{email}"
+
+    @staticmethod
+    def decode(raw: bytes) -> dict:
+        return UserDbModel.model_validate_json(raw).model_dump()
+
+    async def get(self, email: str) -> Optional[User]:
+        """
+        новий (не прив'язаний до сесії) User з кешу або None
+        """
+        fields = self.local.get(email)
+        if fields is not None:
+            AUTH_CACHE.labels("user", "local").inc()
+            return User(**fields)
+        try:
+            raw = await self.redis.get(self._key(email))
+        except RedisError as err:
+            logger.warning("User cache read failed: %s", err)
+            AUTH_CACHE.labels("user", "error").inc()
+            return None
+        try:
+            fields = self.decode(raw) if raw is not None else None
+        except ValueError:
+            # запис старого формату (pickle) - читаємо користувача з бази
+            fields = None
+        if fields is None:
+            AUTH_CACHE.labels("user", "miss").inc()
+            return None
+        AUTH_CACHE.labels("user", "redis").inc()
+        self.local.set(email, fields)
+        return User(**fields)
+
+    async def set(self, user: User, overwrite: bool = True) -> None:
+        """
+        overwrite=False - заповнення після промаху (cache-aside): SET NX, щоб
+        рядок, прочитаний з бази до refresh() іншого запиту, не затер нове значення
+        """
+        model = UserDbModel.model_validate(user, from_attributes=True)
+        raw = model.model_dump_json()
+        try:
+            stored = await self.redis.set(
+                self._key(user.email), raw, ex=settings.redis_cache_timeout, nx=not overwrite
+            )
+        except RedisError as err:
+            logger.warning("User cache write failed: %s", err)
+            stored = True
+        if stored:
+            self.local.set(user.email, model.model_dump())
+
+    async def _publish(self, email: str) -> None:
+        try:
+            await self.redis.publish(self.CHANNEL, f"{self.instance_id}:{email}")
+        except RedisError as err:
+            logger.warning("User cache invalidation publish failed: %s", err)
+
+    async def refresh(self, user: User) -> None:
+        """
+        write-through після зміни користувача: нове значення в Redis та
+        локально, інші воркери видаляють свої локальні копії
+        """
+        await self.set(user)
+        await self._publish(user.email)
+
+    async def invalidate(self, email: str) -> None:
+        self.local.pop(email)
+        try:
+            await self.redis.delete(self._key(email))
+        except RedisError as err:
+            logger.warning("User cache invalidation failed: %s", err)
+        await self._publish(email)
+
+    async def listen(self) -> None:
+        """
+        фонова задача воркера: видаляє локальні копії користувачів, змінених
+        іншими воркерами; після перепідключення локальний рівень очищується,
+        бо повідомлення за час розриву втрачені
+        """
+        while True:
+            try:
+                async with self.redis.pubsub() as pubsub:
+                    await pubsub.subscribe(self.CHANNEL)
+                    self.local.clear()
+                    async for message in pubsub.listen():
+                        if message["type"] != "message":
+                            continue
+                        sender, _, email = message["data"].decode().partition(":")
+                        if sender != self.instance_id:
+                            self.local.pop(email)
+            except asyncio.CancelledError:
+                raise
+            except RedisError as err:
+                logger.warning("User cache invalidation channel is down: %s", err)
+                self.local.clear()
+                await asyncio.sleep(1)
+
+
+user_cache = UserCache()
@@ -0,0 +1,97 @@
+import os
+import tempfile
+
+# Settings читаються при імпорті src - значення для тестів задаються до нього
+_tmp = tempfile.mkdtemp(prefix="contacts-tests-")
+for name, value in {
+    "SECRET_KEY": "test-secret",
+    "ALGORITHM": "HS256",
+    "BCRYPT_ROUNDS": "4",
+    "DB_URL": f"sqlite:///{_tmp}/primary.db",
+    "MAIL_USERNAME": "test",
+    "MAIL_FROM": "test@example.com",
+    "MAIL_PASSWORD": "test",
+    "MAIL_PORT": "25",
+    "MAIL_SERVER": "localhost",
+    "MAIL_START_TLS": "false",
+    "MAIL_SSL_TLS": "false",
+    "MAIL_USE_CREDENTIALS": "false",
+    "MAIL_VALIDATE_CERTS": "false",
+    "CLOUDINARY_NAME": "test",
+    "CLOUDINARY_API_KEY": "test",
+    "CLOUDINARY_API_SECRET": "test",
+}.items():
+    os.environ.setdefault(name, value)
+
+import pytest  # noqa: E402
+from fakeredis import FakeAsyncRedis  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine  # noqa: E402
+from sqlalchemy.schema import CreateTable  # noqa: E402
+
+from src.database.db import to_async_url  # noqa: E402
+from src.database.models import Contact, EmailOutbox, User  # noqa: E402
+from src.database.redis_pool import close_redis, init_redis  # noqa: E402
+
+
+async def create_sqlite_engine(path) -> AsyncEngine:
+    """
+    SQLite база з таблицями, що не залежать від розширень Postgres
+    """
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with engine.begin() as connection:
+        await connection.run_sync(
+            lambda sync: User.metadata.create_all(sync, tables=[User.__table__, EmailOutbox.__table__])
+        )
+    return engine
+
+
+@pytest.fixture
+async def sqlite_engine(tmp_path):
+    engine = await create_sqlite_engine(tmp_path / "primary.db")
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture
+def session_factory(sqlite_engine):
+    return async_sessionmaker(sqlite_engine, expire_on_commit=False)
+
+
+@pytest.fixture
+async def fake_redis():
+    client = init_redis(FakeAsyncRedis())
+    yield client
+    await close_redis()
+
+
+def _create_postgres_schema(connection) -> None:
+    tables = [User.__table__, Contact.__table__]
+    User.metadata.drop_all(connection, tables=tables)
+    for table in tables:
+        connection.execute(CreateTable(table))
+        # GIN індекси потребують pg_trgm та btree_gin - для тестів не потрібні
+        for index in table.indexes:
+            if not index.dialect_options["postgresql"]["using"]:
+                index.create(connection)
+
+
+@pytest.fixture
+async def postgres_engine():
+    """
+    тести запитів, специфічних для PostgreSQL (ANY(масив), RETURNING з
+    порядком параметрів, обчислювані стовпці); база з TEST_POSTGRES_URL
+    перестворюється для кожного тесту
+    """
+    url = os.environ.get("TEST_POSTGRES_URL")
+    if not url:
+        pytest.skip("TEST_POSTGRES_URL is not set")
+    engine = create_async_engine(to_async_url(url))
+    async with engine.begin() as connection:
+        await connection.run_sync(_create_postgres_schema)
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture
+def postgres_session_factory(postgres_engine):
+    return async_sessionmaker(postgres_engine, expire_on_commit=False)
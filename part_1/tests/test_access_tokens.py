@@ -0,0 +1,96 @@
+from datetime import datetime, timedelta
+
+import jose.jwt
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import select
+
+from src.configuration.config import settings
+from src.database.models import User
+from src.routes import auth
+from src.services import lru_cache
+from src.services.auth import auth_service
+from src.services.user_cache import user_cache
+
+
+@pytest.fixture(autouse=True)
+def clean_caches():
+    auth_service.token_cache.clear()
+    user_cache.local.clear()
+    yield
+    auth_service.token_cache.clear()
+    user_cache.local.clear()
+
+
+@pytest.fixture
+async def user(session_factory, fake_redis) -> User:
+    async with session_factory() as db:
+        user = User(
+            username="alice", email="alice@example.com", password="hash",
+            refresh_token="refresh", confirmed=True, created_at=datetime(2024, 1, 1)
+        )
+        db.add(user)
+        await db.commit()
+    return user
+
+
+def shift_clock(monkeypatch, seconds: float) -> None:
+    """
+    час кешу токенів та перевірки exp в jose - на seconds вперед
+    """
+    monotonic = lru_cache.time.monotonic
+
+    class Later(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return datetime.now(tz) + timedelta(seconds=seconds)
+
+    monkeypatch.setattr(lru_cache.time, "monotonic", lambda: monotonic() + seconds)
+    monkeypatch.setattr(jose.jwt, "datetime", Later)
+
+
+async def current_user(token: str, session_factory) -> User:
+    async with session_factory() as db:
+        return await auth_service.get_current_user(token, db)
+
+
+async def test_cached_claims_expire_with_token(user, session_factory, monkeypatch):
+    token = await auth_service.create_access_token({"sub": user.email}, expires_delta=60)
+    assert (await current_user(token, session_factory)).id == user.id
+    assert len(auth_service.token_cache) == 1
+
+    shift_clock(monkeypatch, 120)
+
+    with pytest.raises(HTTPException) as error:
+        await current_user(token, session_factory)
+    assert error.value.status_code == 401
+
+
+async def test_revocation_beats_cached_claims(user, session_factory, fake_redis, monkeypatch):
+    monkeypatch.setattr(settings, "jwt_revocation_check", True)
+    token = await auth_service.create_access_token({"sub": user.email})
+    assert (await current_user(token, session_factory)).id == user.id
+
+    # відкликання іншим воркером: локальний кеш claims цього воркера не змінюється
+    key = f"revoked-token:{auth_service._token_hash(token).hex()}"
+    await fake_redis.set(key, 1)
+
+    assert len(auth_service.token_cache) == 1
+    with pytest.raises(HTTPException) as error:
+        await current_user(token, session_factory)
+    assert error.value.status_code == 401
+
+
+async def test_logout_revokes_tokens(user, session_factory, fake_redis, monkeypatch):
+    monkeypatch.setattr(settings, "jwt_revocation_check", True)
+    token = await auth_service.create_access_token({"sub": user.email})
+    async with session_factory() as db:
+        await auth.logout(token, await auth_service.get_current_user(token, db), db)
+
+    # ключ відкликання живе до exp токена
+    key = f"revoked-token:{auth_service._token_hash(token).hex()}"
+    assert 0 < await fake_redis.ttl(key) <= 15 * 60 + 1
+    with pytest.raises(HTTPException):
+        await current_user(token, session_factory)
+    async with session_factory() as db:
+        assert (await db.scalar(select(User.refresh_token))) is None
@@ -0,0 +1,80 @@
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+
+from src.database.models import EmailOutbox, User
+from src.repository.outbox import enqueue_email
+from src.routes import auth
+from src.schemas.schemas import RequestEmail, UserModel
+from src.services.auth import auth_service
+
+REQUEST = SimpleNamespace(base_url="http://testserver/")
+
+
+async def count(model, session_factory) -> int:
+    async with session_factory() as db:
+        return await db.scalar(select(func.count()).select_from(model))
+
+
+async def test_signup_commits_user_and_email_together(session_factory):
+    async with session_factory() as db:
+        body = UserModel(username="alice", email="alice@example.com", password="secret1")
+        await auth.signup(body, REQUEST, db)
+
+    assert await count(User, session_factory) == 1
+    async with session_factory() as db:
+        message = (await db.execute(select(EmailOutbox))).scalar_one()
+    assert message.recipient == "alice@example.com"
+    assert message.template_body["username"] == "alice"
+
+
+async def test_failed_signup_leaves_no_email(session_factory, monkeypatch):
+    async with session_factory() as db:
+        db.add(User(username="alice", email="alice@example.com", password="hash"))
+        await db.commit()
+
+    async def missing_user(email, db):
+        return None
+
+    # паралельний запит з тим же email, який не помітила перевірка в signup
+    monkeypatch.setattr(auth.rep_users, "get_user_by_email", missing_user)
+    async with session_factory() as db:
+        body = UserModel(username="alice2", email="alice@example.com", password="secret1")
+        with pytest.raises(IntegrityError):
+            await auth.signup(body, REQUEST, db)
+
+    assert await count(EmailOutbox, session_factory) == 0
+
+
+async def test_signup_without_email_leaves_no_user(session_factory, monkeypatch):
+    async def broken_token(data):
+        raise RuntimeError("token service is down")
+
+    monkeypatch.setattr(auth_service, "create_email_token", broken_token)
+    async with session_factory() as db:
+        body = UserModel(username="alice", email="alice@example.com", password="secret1")
+        with pytest.raises(RuntimeError):
+            await auth.signup(body, REQUEST, db)
+
+    assert await count(User, session_factory) == 0
+
+
+async def test_enqueue_email_does_not_commit(session_factory):
+    async with session_factory() as db:
+        await enqueue_email("bob@example.com", "Subject", "template.html", {}, db)
+        await db.rollback()
+
+    assert await count(EmailOutbox, session_factory) == 0
+
+
+async def test_resend_verification_commits_email(session_factory):
+    async with session_factory() as db:
+        db.add(User(username="bob", email="bob@example.com", password="hash"))
+        await db.commit()
+
+    async with session_factory() as db:
+        await auth.request_email_verification(RequestEmail(email="bob@example.com"), REQUEST, db)
+
+    assert await count(EmailOutbox, session_factory) == 1
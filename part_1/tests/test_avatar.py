@@ -0,0 +1,49 @@
+import io
+
+import pytest
+from fastapi import HTTPException, UploadFile
+from PIL import Image
+
+from src.configuration.config import settings
+from src.database.models import User
+from src.services import avatar
+from src.services.avatar import AvatarService, AvatarStorage, LocalStorage
+
+
+def upload(data: bytes) -> UploadFile:
+    return UploadFile(io.BytesIO(data), filename="avatar.png")
+
+
+def png(width: int, height: int) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), "red").save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def test_storage_requires_save():
+    with pytest.raises(TypeError):
+        AvatarStorage()
+
+
+async def test_update_resizes_in_process_pool(tmp_path, session_factory, fake_redis, monkeypatch):
+    monkeypatch.setattr(avatar, "create_storage", lambda: LocalStorage(str(tmp_path / "avatars"), "/static"))
+    service = AvatarService()
+    async with session_factory() as db:
+        user = User(username="alice", email="alice@example.com", password="hash")
+        db.add(user)
+        await db.commit()
+        try:
+            await service.update(user, upload(png(400, 300)), db)
+        finally:
+            service.shutdown()
+
+    assert user.avatar.startswith(f"/static/{user.id}.jpg?v=")
+    with Image.open(tmp_path / "avatars" / f"{user.id}.jpg") as image:
+        assert image.size == (settings.avatar_size, settings.avatar_size)
+
+
+async def test_too_large_upload_is_rejected(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "avatar_max_bytes", 1024)
+    with pytest.raises(HTTPException) as error:
+        await AvatarService._save_upload(upload(b"x" * 2048), tmp_path / "upload")
+    assert error.value.status_code == 413
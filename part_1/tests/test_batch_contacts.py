@@ -0,0 +1,173 @@
+from datetime import date, datetime
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import insert, select
+
+from src.database.models import Contact, User
+from src.repository import contacts as rep_contacts
+from src.routes import contact as contact_routes
+from src.schemas.schemas import ContactBatchOperationSchema, ContactBatchRequestSchema, ContactSchema
+
+
+def contact_data(email: str, first_name: str = "name") -> ContactSchema:
+    return ContactSchema(
+        first_name=first_name, last_name="last", email=email, phone_number="123",
+        birthday=date(1990, 5, 1), additional_info=None
+    )
+
+
+def operation(op: str, contact_id: int = None, email: str = None, first_name: str = "name"):
+    data = None if email is None else contact_data(email, first_name)
+    return ContactBatchOperationSchema(op=op, id=contact_id, data=data)
+
+
+async def add_user(db, user_id: int) -> User:
+    user = User(
+        id=user_id, username=f"user{user_id}", email=f"user{user_id}@example.com",
+        password="x", created_at=datetime(2024, 1, 1), confirmed=True
+    )
+    db.add(user)
+    await db.commit()
+    return user
+
+
+async def add_contact(db, user: User, email: str) -> int:
+    contact = Contact(**contact_data(email).model_dump(), user_id=user.id)
+    db.add(contact)
+    await db.commit()
+    return contact.id
+
+
+async def emails_of(db, user_id: int) -> dict:
+    rows = await db.execute(
+        select(Contact.id, Contact.email, Contact.first_name).where(Contact.user_id == user_id)
+    )
+    return {row.id: (row.email, row.first_name) for row in rows}
+
+
+@pytest.fixture
+async def db(postgres_session_factory, fake_redis):
+    async with postgres_session_factory() as session:
+        yield session
+
+
+async def test_batch_mixed_operations(db):
+    user = await add_user(db, 1)
+    updated_id = await add_contact(db, user, "old@example.com")
+    deleted_id = await add_contact(db, user, "gone@example.com")
+
+    results = await rep_contacts.batch_contacts([
+        operation("create", email="c1@example.com"),
+        operation("update", updated_id, "new@example.com", "renamed"),
+        operation("delete", deleted_id),
+        operation("create", email="c2@example.com"),
+        operation("create", email="c2@example.com"),
+    ], user, db)
+
+    assert [(result.index, result.op, result.status) for result in results] == [
+        (0, "create", 201), (1, "update", 200), (2, "delete", 204),
+        (3, "create", 201), (4, "create", 409)
+    ]
+    # RETURNING з sort_by_parameter_order: id відповідають порядку операцій
+    assert results[0].contact.email == "c1@example.com"
+    assert results[3].contact.email == "c2@example.com"
+    assert results[0].id < results[3].id
+    assert results[1].contact.first_name == "renamed"
+
+    assert await emails_of(db, 1) == {
+        updated_id: ("new@example.com", "renamed"),
+        results[0].id: ("c1@example.com", "name"),
+        results[3].id: ("c2@example.com", "name"),
+    }
+
+
+async def test_batch_created_order_matches_operations(db):
+    user = await add_user(db, 1)
+    emails = [f"c{index}@example.com" for index in range(20)]
+
+    results = await rep_contacts.batch_contacts(
+        [operation("create", email=email) for email in emails], user, db
+    )
+
+    assert [result.contact.email for result in results] == emails
+    stored = await emails_of(db, 1)
+    assert [stored[result.id][0] for result in results] == emails
+
+
+async def test_batch_rejects_other_users_contact(db):
+    owner = await add_user(db, 1)
+    other = await add_user(db, 2)
+    foreign_id = await add_contact(db, other, "foreign@example.com")
+
+    results = await rep_contacts.batch_contacts([
+        operation("update", foreign_id, "stolen@example.com"),
+        operation("delete", foreign_id),
+    ], owner, db)
+
+    assert [result.status for result in results] == [404, 404]
+    assert await emails_of(db, 2) == {foreign_id: ("foreign@example.com", "name")}
+
+
+async def test_batch_reuses_email_of_deleted_contact(db):
+    user = await add_user(db, 1)
+    deleted_id = await add_contact(db, user, "same@example.com")
+    kept_id = await add_contact(db, user, "kept@example.com")
+
+    results = await rep_contacts.batch_contacts([
+        operation("create", email="same@example.com", first_name="again"),
+        operation("delete", deleted_id),
+        operation("update", kept_id, "kept@example.com", "renamed"),
+    ], user, db)
+
+    assert [result.status for result in results] == [201, 204, 200]
+    assert await emails_of(db, 1) == {
+        results[0].id: ("same@example.com", "again"),
+        kept_id: ("kept@example.com", "renamed"),
+    }
+
+
+async def test_batch_does_not_reuse_email_freed_by_update(db):
+    user = await add_user(db, 1)
+    moved_id = await add_contact(db, user, "moved@example.com")
+
+    results = await rep_contacts.batch_contacts([
+        operation("update", moved_id, "elsewhere@example.com"),
+        operation("create", email="moved@example.com"),
+    ], user, db)
+
+    assert [result.status for result in results] == [200, 409]
+
+
+async def test_batch_conflict_rolls_back_everything(db, postgres_engine, monkeypatch):
+    user = await add_user(db, 1)
+    updated_id = await add_contact(db, user, "old@example.com")
+    deleted_id = await add_contact(db, user, "gone@example.com")
+    execute = db.execute
+
+    async def execute_with_race(statement, *args, **kwargs):
+        result = await execute(statement, *args, **kwargs)
+        if "emails" in str(statement):
+            # між перевіркою email та INSERT інший запит створює такий самий email
+            async with postgres_engine.begin() as connection:
+                await connection.execute(insert(Contact).values(
+                    **contact_data("race@example.com").model_dump(), user_id=user.id
+                ))
+        return result
+
+    monkeypatch.setattr(db, "execute", execute_with_race)
+    body = ContactBatchRequestSchema(operations=[
+        operation("update", updated_id, "new@example.com"),
+        operation("delete", deleted_id),
+        operation("create", email="race@example.com"),
+    ])
+
+    with pytest.raises(HTTPException) as error:
+        await contact_routes.batch_contacts(body, user=user, db=db)
+
+    assert error.value.status_code == 409
+    # rollback скасував і DELETE, і UPDATE з цього ж пакета
+    stored = await emails_of(db, 1)
+    assert stored[updated_id] == ("old@example.com", "name")
+    assert stored[deleted_id] == ("gone@example.com", "name")
+    assert len(stored) == 3
@@ -0,0 +1,124 @@
+from datetime import date
+
+from redis.asyncio.client import Pipeline
+
+from src.configuration.config import settings
+from src.database.models import Contact
+from src.services.birthday_calendar import birthday_calendar
+from src.services.birthdays import day_of_year
+
+USER_ID = 1
+WHOLE_YEAR = [(1, 366)]
+
+
+def make_contact(contact_id: int, birthday: date) -> Contact:
+    return Contact(
+        id=contact_id, first_name=f"name{contact_id}", last_name="last",
+        email=f"c{contact_id}@example.com", phone_number="123", additional_info=None,
+        birthday=birthday, birthday_doy=day_of_year(birthday), user_id=USER_ID
+    )
+
+
+class SnapshotSession:
+    """
+    stream_scalars віддає знімок контактів; during_read виконується
+    посередині читання - як зміна контактів в іншому запиті
+    """
+
+    def __init__(self, contacts, during_read=None):
+        self.contacts = contacts
+        self.during_read = during_read
+
+    async def stream_scalars(self, query):
+        async def rows():
+            for index, contact in enumerate(self.contacts):
+                if index == 1 and self.during_read is not None:
+                    await self.during_read()
+                yield contact
+        return rows()
+
+
+async def upcoming_ids():
+    contacts = await birthday_calendar.upcoming(USER_ID, WHOLE_YEAR, 0, 100)
+    return None if contacts is None else [contact.id for contact in contacts]
+
+
+async def test_rebuild_orders_by_birthday(fake_redis):
+    snapshot = [make_contact(1, date(1990, 5, 1)), make_contact(2, date(1985, 1, 10))]
+
+    assert await birthday_calendar.rebuild(USER_ID, SnapshotSession(snapshot))
+    assert await upcoming_ids() == [2, 1]
+
+
+async def test_rebuild_discards_snapshot_when_contact_added(fake_redis):
+    snapshot = [make_contact(1, date(1990, 5, 1)), make_contact(2, date(1985, 1, 10))]
+    added = make_contact(3, date(2000, 3, 3))
+
+    async def add_contact():
+        await birthday_calendar.add(USER_ID, [added])
+
+    assert not await birthday_calendar.rebuild(USER_ID, SnapshotSession(snapshot, add_contact))
+    # знімок без нового контакту не записано - наступне читання піде в базу
+    assert await upcoming_ids() is None
+
+    assert await birthday_calendar.rebuild(USER_ID, SnapshotSession(snapshot + [added]))
+    assert await upcoming_ids() == [2, 3, 1]
+
+
+async def test_built_calendar_keeps_contact_added_during_rebuild(fake_redis):
+    snapshot = [make_contact(1, date(1990, 5, 1)), make_contact(2, date(1985, 1, 10))]
+    assert await birthday_calendar.rebuild(USER_ID, SnapshotSession(snapshot))
+    added = make_contact(3, date(2000, 3, 3))
+
+    async def add_contact():
+        await birthday_calendar.add(USER_ID, [added])
+
+    # щоденний rollover поверх побудованого календаря
+    assert not await birthday_calendar.rebuild(USER_ID, SnapshotSession(snapshot, add_contact))
+    assert await upcoming_ids() == [2, 3, 1]
+
+
+async def test_rebuild_does_not_restore_removed_contact(fake_redis):
+    snapshot = [make_contact(1, date(1990, 5, 1)), make_contact(2, date(1985, 1, 10))]
+    assert await birthday_calendar.rebuild(USER_ID, SnapshotSession(snapshot))
+
+    async def remove_contact():
+        await birthday_calendar.remove(USER_ID, [1])
+
+    assert not await birthday_calendar.rebuild(USER_ID, SnapshotSession(snapshot, remove_contact))
+    assert await upcoming_ids() == [2]
+
+
+async def test_add_expires_calendar_keys(fake_redis):
+    assert await birthday_calendar.rebuild(USER_ID, SnapshotSession([make_contact(1, date(1990, 5, 1))]))
+    await fake_redis.persist("birthdays:1")
+    await fake_redis.persist("birthdays:1:contacts")
+
+    await birthday_calendar.add(USER_ID, [make_contact(2, date(1985, 1, 10))])
+
+    for key in ("birthdays:1", "birthdays:1:contacts"):
+        assert 0 < await fake_redis.ttl(key) <= settings.birthday_calendar_ttl
+    assert await upcoming_ids() == [2, 1]
+
+
+async def test_add_skips_calendar_invalidated_concurrently(fake_redis, monkeypatch):
+    assert await birthday_calendar.rebuild(USER_ID, SnapshotSession([make_contact(1, date(1990, 5, 1))]))
+    version = await fake_redis.get("birthdays:1:version")
+    exists = Pipeline.exists
+    invalidated = []
+
+    async def exists_then_invalidate(pipe, *names):
+        result = await exists(pipe, *names)
+        if not invalidated:
+            # інший запит скидає календар між перевіркою built та записом
+            invalidated.append(True)
+            await fake_redis.delete("birthdays:1", "birthdays:1:contacts", "birthdays:1:built")
+        return result
+
+    monkeypatch.setattr(Pipeline, "exists", exists_then_invalidate)
+    await birthday_calendar.add(USER_ID, [make_contact(2, date(1985, 1, 10))])
+
+    # запис повторено вже для непобудованого календаря: лише нова версія
+    assert await fake_redis.exists("birthdays:1", "birthdays:1:contacts") == 0
+    assert await fake_redis.get("birthdays:1:version") != version
+    assert await upcoming_ids() is None
@@ -0,0 +1,49 @@
+from datetime import date
+
+import pytest
+
+from src.services.birthdays import DAYS_IN_YEAR, FEB_29, birthday_window, day_of_year
+
+
+def test_day_of_year_does_not_depend_on_year():
+    assert day_of_year(date(1999, 2, 28)) == 59
+    assert day_of_year(date(2000, 2, 29)) == FEB_29
+    assert day_of_year(date(1999, 3, 1)) == day_of_year(date(2000, 3, 1)) == 61
+    assert day_of_year(date(1999, 12, 31)) == DAYS_IN_YEAR
+
+
+def test_window_inside_year():
+    assert birthday_window(date(2025, 6, 1), 7) == [(153, 159)]
+
+
+@pytest.mark.parametrize("today, days, segments", [
+    # 28.12 - 03.01: хвіст року та його початок
+    (date(2025, 12, 28), 7, [(363, 366), (1, 3)]),
+    # вікно закінчується 31.12
+    (date(2025, 12, 25), 7, [(360, 366)]),
+    # вікно починається 01.01
+    (date(2026, 1, 1), 3, [(1, 3)]),
+])
+def test_window_wraps_year(today, days, segments):
+    assert birthday_window(today, days) == segments
+
+
+def test_window_of_whole_year():
+    assert birthday_window(date(2025, 3, 10), 366) == [(70, 366), (1, 69)]
+    assert birthday_window(date(2025, 1, 1), 400) == [(1, 366)]
+
+
+def test_feb_29_celebrated_on_feb_28_in_common_year():
+    # 28.02 - останній день вікна: 29.02 вже входить
+    assert birthday_window(date(2025, 2, 22), 7) == [(53, FEB_29)]
+    assert birthday_window(date(2025, 2, 28), 1) == [(59, FEB_29)]
+
+
+def test_feb_29_in_leap_year():
+    assert birthday_window(date(2024, 2, 22), 7) == [(53, 59)]
+    assert birthday_window(date(2024, 2, 29), 1) == [(FEB_29, FEB_29)]
+    assert birthday_window(date(2024, 2, 28), 3) == [(59, 61)]
+
+
+def test_window_across_feb_in_common_year_includes_feb_29():
+    assert birthday_window(date(2025, 2, 27), 3) == [(58, 61)]
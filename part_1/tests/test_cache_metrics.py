@@ -0,0 +1,67 @@
+from datetime import datetime
+
+import pytest
+from fakeredis import FakeAsyncRedis, FakeServer
+from prometheus_client import REGISTRY
+
+from src.database.models import User
+from src.database.redis_pool import close_redis, init_redis
+from src.services.response_cache import response_cache
+from src.services.user_cache import user_cache
+
+
+def sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+@pytest.fixture
+async def broken_redis():
+    server = FakeServer()
+    server.connected = False
+    yield init_redis(FakeAsyncRedis(server=server))
+    await close_redis()
+
+
+async def test_response_cache_lookups(fake_redis):
+    hits = sample("response_cache_lookups_total", result="hit")
+    misses = sample("response_cache_lookups_total", result="miss")
+
+    assert await response_cache.get("contacts-cache:test") is None
+    await response_cache.set("contacts-cache:test", b"[]", {})
+    assert await response_cache.get("contacts-cache:test") == (b"[]", {})
+
+    assert sample("response_cache_lookups_total", result="miss") == misses + 1
+    assert sample("response_cache_lookups_total", result="hit") == hits + 1
+
+
+async def test_response_cache_counts_redis_errors(broken_redis):
+    errors = sample("response_cache_lookups_total", result="error")
+
+    assert await response_cache.get("contacts-cache:test") is None
+    assert sample("response_cache_lookups_total", result="error") == errors + 1
+
+
+async def test_user_cache_counts_redis_errors(broken_redis):
+    errors = sample("auth_cache_lookups_total", cache="user", result="error")
+    misses = sample("auth_cache_lookups_total", cache="user", result="miss")
+
+    assert await user_cache.get("nobody@example.com") is None
+    assert sample("auth_cache_lookups_total", cache="user", result="error") == errors + 1
+    assert sample("auth_cache_lookups_total", cache="user", result="miss") == misses
+
+
+async def test_user_cache_levels(fake_redis):
+    user = User(
+        id=1, username="alice", email="alice@example.com", password="hash",
+        confirmed=True, created_at=datetime(2024, 1, 1)
+    )
+    await user_cache.set(user)
+    user_cache.local.clear()
+    redis_hits = sample("auth_cache_lookups_total", cache="user", result="redis")
+    local_hits = sample("auth_cache_lookups_total", cache="user", result="local")
+
+    assert (await user_cache.get(user.email)).id == 1
+    assert (await user_cache.get(user.email)).id == 1
+
+    assert sample("auth_cache_lookups_total", cache="user", result="redis") == redis_hits + 1
+    assert sample("auth_cache_lookups_total", cache="user", result="local") == local_hits + 1
@@ -0,0 +1,74 @@
+import io
+
+from src.services.contacts_io import iter_import_chunks
+
+CSV_HEADER = "first_name,last_name,email,phone_number,birthday,additional_info\r\n"
+
+
+def parse(content: str, file_format: str, chunk_size: int = 100):
+    file = io.BytesIO(content.encode("utf-8"))
+    return list(iter_import_chunks(file, file_format, chunk_size))
+
+
+def collect(chunks):
+    rows = [row for chunk_rows, _ in chunks for row in chunk_rows]
+    errors = [error for _, chunk_errors in chunks for error in chunk_errors]
+    return rows, errors
+
+
+def test_csv_lines_and_errors():
+    content = "\ufeff" + CSV_HEADER + (
+        "Ada,Lovelace,ada@example.com,123,1815-12-10,\r\n"
+        "Bad,Email,not-an-email,123,1815-12-10,\r\n"
+        "\r\n"
+        'Alan,Turing,alan@example.com,456,1912-06-23,"two\r\nlines"\r\n'
+        "Grace,Hopper,grace@example.com,789,1906-13-09,note\r\n"
+    )
+    rows, errors = collect(parse(content, "csv"))
+
+    assert [(line, contact.first_name) for line, contact in rows] == [(2, "Ada"), (5, "Alan")]
+    assert rows[0][1].additional_info is None
+    assert rows[1][1].additional_info == "two\r\nlines"
+    # рядок з переносом у лапках займає рядки 5-6, тож наступний запис - рядок 7
+    assert [error.line for error in errors] == [3, 7]
+    assert errors[0].errors[0].startswith("email:")
+    assert errors[1].errors[0].startswith("birthday:")
+
+
+def test_csv_missing_and_extra_columns():
+    content = CSV_HEADER + (
+        "Ada,Lovelace,ada@example.com\r\n"
+        "Alan,Turing,alan@example.com,456,1912-06-23,,extra\r\n"
+    )
+    rows, errors = collect(parse(content, "csv"))
+
+    assert [error.line for error in errors] == [2]
+    assert {message.split(":")[0] for message in errors[0].errors} == {"phone_number", "birthday"}
+    assert [line for line, _ in rows] == [3]
+
+
+def test_ndjson_lines_and_errors():
+    content = (
+        '{"first_name": "Ada", "last_name": "Lovelace", "email": "ada@example.com",'
+        ' "phone_number": "123", "birthday": "1815-12-10"}\n'
+        "\n"
+        "{not json}\n"
+        "[1, 2]\n"
+        '{"first_name": "Alan"}\n'
+    )
+    rows, errors = collect(parse(content, "ndjson"))
+
+    assert [line for line, _ in rows] == [1]
+    assert [error.line for error in errors] == [3, 4, 5]
+    assert errors[0].errors[0].startswith("invalid JSON:")
+    assert errors[1].errors == ["JSON object expected"]
+    assert "last_name: Field required" in errors[2].errors
+
+
+def test_chunks_count_rows_and_errors():
+    content = CSV_HEADER + "".join(
+        f"Name{index},Last,user{index}@example.com,123,2000-01-0{index + 1},\r\n" for index in range(5)
+    ) + "Bad,Row,bad,123,2000-01-01,\r\n"
+    chunks = parse(content, "csv", chunk_size=2)
+
+    assert [(len(rows), len(errors)) for rows, errors in chunks] == [(2, 0), (2, 0), (1, 1)]
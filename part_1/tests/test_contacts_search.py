@@ -0,0 +1,24 @@
+from types import SimpleNamespace
+
+from sqlalchemy.dialects import postgresql
+
+from src.repository import contacts as rep_contacts
+
+
+class RecordingSession:
+    def __init__(self):
+        self.info = {}
+        self.statements = []
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+        return SimpleNamespace(all=lambda: [])
+
+
+async def test_rank_search_groups_similarity_operand():
+    db = RecordingSession()
+    await rep_contacts.rank_search_contacts("jon", SimpleNamespace(id=1), 0, 10, db)
+
+    sql = str(db.statements[-1].compile(dialect=postgresql.dialect()))
+    # без дужок Postgres розбирає "q <% a || b" як "(q <% a) || b"
+    assert "<%% (contacts.first_name || ' ' || contacts.last_name || ' ' || contacts.email)" in sql
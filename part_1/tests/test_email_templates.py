@@ -0,0 +1,22 @@
+from src.services.email_templates import email_templates
+
+CONTEXT = {"host": "http://testserver/", "username": "<alice>", "token": "token"}
+
+
+async def test_render_bulk_keeps_order_and_escapes():
+    items = [("email_verification_template.html", {**CONTEXT, "username": f"user{index}"}) for index in range(10)]
+
+    bodies = await email_templates.render_bulk(items)
+    assert [f"user{index}" in body for index, body in enumerate(bodies)] == [True] * 10
+    assert "&lt;alice&gt;" in email_templates.render("email_verification_template.html", CONTEXT)
+
+
+async def test_render_bulk_returns_errors_per_item():
+    bodies = await email_templates.render_bulk([
+        ("email_verification_template.html", CONTEXT),
+        ("missing_template.html", CONTEXT),
+        ("email_password_reset_template.html", CONTEXT),
+    ])
+
+    assert isinstance(bodies[0], str) and isinstance(bodies[2], str)
+    assert isinstance(bodies[1], KeyError)
@@ -0,0 +1,150 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+import aiosmtplib
+import pytest
+from prometheus_client import REGISTRY
+
+from src.configuration.config import settings
+from src.database.models import EmailOutbox
+from src.services import email_worker
+from src.services.email_worker import EmailWorker
+
+
+class FakeOutbox:
+    """
+    репозиторій outbox в пам'яті: фіксує, що воркер робить з листами пачки
+    """
+
+    def __init__(self, messages):
+        self.messages = messages
+        self.sent = []
+        self.failed = []
+        self.released = []
+
+    async def claim_emails(self, limit, lease, db):
+        messages, self.messages = self.messages[:limit], self.messages[limit:]
+        return messages
+
+    async def mark_sent(self, ids, db):
+        self.sent.extend(ids)
+
+    async def mark_failed(self, message, error, retry_in, db):
+        self.failed.append((message.id, retry_in))
+
+    async def release_emails(self, ids, db):
+        self.released.extend(ids)
+
+
+def make_message(message_id: int, attempts: int = 0) -> EmailOutbox:
+    return EmailOutbox(
+        id=message_id, recipient=f"user{message_id}@example.com", subject="Subject",
+        template_name="email_verification_template.html",
+        template_body={"host": "http://testserver/", "username": "user", "token": "token"},
+        attempts=attempts
+    )
+
+
+@pytest.fixture
+def outbox(monkeypatch):
+    @asynccontextmanager
+    async def session():
+        yield None
+
+    fake = FakeOutbox([make_message(message_id) for message_id in range(1, 5)])
+    for name in ("claim_emails", "mark_sent", "mark_failed", "release_emails"):
+        monkeypatch.setattr(email_worker.rep_outbox, name, getattr(fake, name))
+    monkeypatch.setattr(email_worker, "AsyncSessionLocal", session)
+    return fake
+
+
+def worker_sending(fail_on: dict) -> EmailWorker:
+    worker = EmailWorker()
+
+    async def send(email):
+        recipient = email["To"]
+        if recipient in fail_on:
+            raise fail_on[recipient]
+
+    worker.send = send
+    return worker
+
+
+async def test_batch_is_sent(outbox):
+    assert await worker_sending({}).run_once() == 4
+    assert outbox.sent == [1, 2, 3, 4]
+    assert outbox.failed == outbox.released == []
+
+
+async def test_rejected_message_is_retried_and_batch_continues(outbox):
+    worker = worker_sending({"user2@example.com": aiosmtplib.SMTPRecipientsRefused({})})
+
+    await worker.run_once()
+    assert outbox.sent == [1, 3, 4]
+    assert [message_id for message_id, _ in outbox.failed] == [2]
+    # перша невдала спроба - затримка близько backoff_base
+    assert outbox.failed[0][1] <= settings.email_outbox_backoff_base * 1.2
+
+
+async def test_smtp_outage_releases_rest_of_batch(outbox):
+    worker = worker_sending({"user2@example.com": ConnectionRefusedError("SMTP is down")})
+
+    await worker.run_once()
+    assert outbox.sent == [1]
+    # спроба зарахована лише листу, який справді надсилали
+    assert [message_id for message_id, _ in outbox.failed] == [2]
+    assert outbox.released == [3, 4]
+
+
+async def test_last_attempt_fails_permanently(outbox):
+    outbox.messages = [make_message(1, attempts=settings.email_outbox_max_attempts - 1)]
+    worker = worker_sending({"user1@example.com": aiosmtplib.SMTPDataError(550, "rejected")})
+
+    await worker.run_once()
+    assert outbox.failed == [(1, None)]
+
+
+def sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+async def test_results_are_exported_as_metrics(outbox):
+    sent = sample("email_outbox_messages_total", result="sent")
+    released = sample("email_outbox_messages_total", result="released")
+    batches = sample("email_outbox_batches_total")
+
+    await worker_sending({"user3@example.com": ConnectionRefusedError("SMTP is down")}).run_once()
+    assert sample("email_outbox_messages_total", result="sent") == sent + 2
+    assert sample("email_outbox_messages_total", result="released") == released + 1
+    assert sample("email_outbox_batches_total") == batches + 1
+
+
+async def test_run_survives_failed_iteration(monkeypatch):
+    worker = EmailWorker()
+    calls = []
+
+    async def run_once():
+        calls.append(len(calls))
+        if len(calls) == 1:
+            raise RuntimeError("database is down")
+        if len(calls) == 3:
+            raise asyncio.CancelledError
+        return 0
+
+    monkeypatch.setattr(worker, "run_once", run_once)
+    monkeypatch.setattr(settings, "email_outbox_poll_interval", 0)
+    errors = sample("email_worker_errors_total")
+
+    with pytest.raises(asyncio.CancelledError):
+        await worker.run()
+    assert len(calls) == 3
+    assert sample("email_worker_errors_total") == errors + 1
+
+
+async def test_render_failure_fails_only_that_message(outbox):
+    outbox.messages[1].template_name = "missing_template.html"
+    outbox.messages[2].template_body = None
+
+    await worker_sending({}).run_once()
+    assert outbox.sent == [1, 4]
+    assert outbox.failed == [(2, None), (3, None)]
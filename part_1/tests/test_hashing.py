@@ -0,0 +1,92 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from passlib.context import CryptContext
+from sqlalchemy import select
+
+from src.database.models import User
+from src.routes import auth
+from src.services.auth import auth_service
+from src.services.hashing import PasswordHasher
+
+
+class BlockingContext:
+    """
+    hash не завершується, доки тест не відпустить release
+    """
+
+    def __init__(self):
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def hash(self, password):
+        self.started.set()
+        self.release.wait(5)
+        return f"hash:{password}"
+
+
+async def test_saturated_pool_returns_503():
+    context = BlockingContext()
+    hasher = PasswordHasher(context, workers=1, max_queue=1)
+    running = asyncio.create_task(hasher.hash("first"))
+    queued = asyncio.create_task(hasher.hash("second"))
+    await asyncio.to_thread(context.started.wait, 5)
+
+    try:
+        with pytest.raises(HTTPException) as error:
+            await hasher.hash("third")
+    finally:
+        context.release.set()
+
+    assert error.value.status_code == 503
+    assert error.value.headers == {"Retry-After": "1"}
+    assert await asyncio.gather(running, queued) == ["hash:first", "hash:second"]
+    # після звільнення пулу запити знову приймаються
+    assert await hasher.hash("fourth") == "hash:fourth"
+    hasher.shutdown()
+
+
+def bcrypt_context(rounds: int) -> CryptContext:
+    return CryptContext(
+        schemes=["bcrypt"], deprecated="auto", bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=rounds, bcrypt__max_rounds=rounds
+    )
+
+
+async def login_with_stored_hash(session_factory, stored_hash: str) -> User:
+    async with session_factory() as db:
+        db.add(User(
+            username="alice", email="alice@example.com", password=stored_hash, confirmed=True
+        ))
+        await db.commit()
+    async with session_factory() as db:
+        form = SimpleNamespace(username="alice@example.com", password="secret1")
+        tokens = await auth.login(form, db)
+    async with session_factory() as db:
+        user = (await db.execute(select(User))).scalar_one()
+    assert user.refresh_token == tokens["refresh_token"]
+    return user
+
+
+async def test_login_rehashes_weaker_hash(session_factory, fake_redis, monkeypatch):
+    context = bcrypt_context(5)
+    hasher = PasswordHasher(context, 1, 1)
+    monkeypatch.setattr(auth_service, "password_hasher", hasher)
+
+    user = await login_with_stored_hash(session_factory, bcrypt_context(4).hash("secret1"))
+    hasher.shutdown()
+
+    # новий хеш збережено тим же commit, що й refresh_token
+    assert user.password.startswith("$2b$05$")
+    assert context.verify("secret1", user.password)
+
+
+async def test_login_keeps_current_hash(session_factory, fake_redis):
+    stored_hash = auth_service.pwd_context.hash("secret1")
+
+    user = await login_with_stored_hash(session_factory, stored_hash)
+
+    assert user.password == stored_hash
@@ -0,0 +1,49 @@
+import base64
+
+import pytest
+
+from src.services.pagination import decode_cursor, encode_cursor
+
+
+def raw_cursor(text: str) -> str:
+    return base64.urlsafe_b64encode(text.encode("utf-8")).rstrip(b"=").decode("ascii")
+
+
+def test_round_trip():
+    cursor = encode_cursor("Шевченко", "Тарас", 42)
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor, str, str, int) == ["Шевченко", "Тарас", 42]
+
+
+def test_score_accepts_int_or_float():
+    assert decode_cursor(encode_cursor(1, 7), (int, float), int) == [1, 7]
+    assert decode_cursor(encode_cursor(0.25, 7), (int, float), int) == [0.25, 7]
+
+
+@pytest.mark.parametrize("cursor", [
+    "",
+    "not base64!",
+    "a",
+    "%%%%",
+    raw_cursor("[1, 2"),
+    "//79",
+])
+def test_malformed_cursor(cursor):
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        decode_cursor(cursor, int)
+
+
+@pytest.mark.parametrize("payload", [
+    '{"id": 1}',
+    "1",
+    "[]",
+    "[1, 2]",
+    '["1"]',
+    "[1.5]",
+    "[true]",
+    "[null]",
+])
+def test_tampered_cursor(payload):
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        decode_cursor(raw_cursor(payload), int)
@@ -0,0 +1,98 @@
+from types import SimpleNamespace
+
+import pytest
+from fakeredis import FakeAsyncRedis, FakeServer
+from fastapi import HTTPException
+from prometheus_client import REGISTRY
+
+from src.database.models import User
+from src.database.redis_pool import close_redis, init_redis
+from src.services.rate_limiter import SCOPE_KEY, Quota, RateLimiter, parse_quota
+
+KEY = "rate-limit:test:1"
+# 3 запити, повне наповнення за 3 с - один токен за секунду
+QUOTA = Quota(3, 3)
+
+
+async def redis_now_ms(client) -> int:
+    seconds, microseconds = await client.time()
+    return seconds * 1000 + microseconds // 1000
+
+
+def checks(source: str) -> float:
+    return REGISTRY.get_sample_value(
+        "rate_limit_checks_total", {"route": "test", "source": source}
+    ) or 0.0
+
+
+def test_parse_quota():
+    assert parse_quota("10/60") == Quota(10, 60.0)
+    assert parse_quota("5") == Quota(5, 1.0)
+    with pytest.raises(ValueError):
+        parse_quota("0/60")
+
+
+async def test_burst_then_rejection(fake_redis):
+    limiter = RateLimiter()
+    results = [await limiter._hit_redis(KEY, QUOTA) for _ in range(4)]
+
+    assert [result.allowed for result in results] == [True, True, True, False]
+    assert [result.remaining for result in results] == [2, 1, 0, 0]
+    # до наступного токена близько секунди
+    assert 900 <= results[-1].retry_after <= 1000
+    assert 2900 <= results[-1].reset <= 3000
+    assert 0 < await fake_redis.pttl(KEY) <= 3000
+
+
+async def test_refill(fake_redis):
+    limiter = RateLimiter()
+    # порожній bucket, останнє звернення 2 с тому - поповнилось 2 токени
+    await fake_redis.hset(KEY, mapping={"tokens": 0, "ts": await redis_now_ms(fake_redis) - 2000})
+
+    results = [await limiter._hit_redis(KEY, QUOTA) for _ in range(3)]
+    assert [result.allowed for result in results] == [True, True, False]
+
+
+async def test_refill_is_capped_by_capacity(fake_redis):
+    limiter = RateLimiter()
+    await fake_redis.hset(KEY, mapping={"tokens": 1, "ts": await redis_now_ms(fake_redis) - 60000})
+
+    result = await limiter._hit_redis(KEY, QUOTA)
+    assert result.allowed and result.remaining == QUOTA.times - 1
+
+
+async def test_check_rejects_with_headers(fake_redis, monkeypatch):
+    limiter = RateLimiter()
+    monkeypatch.setattr(limiter, "quota", lambda route, user: Quota(1, 60))
+    user = User(id=1, email="alice@example.com")
+    request = SimpleNamespace(scope={})
+
+    await limiter.check("test", user, request)
+    assert request.scope[SCOPE_KEY]["X-RateLimit-Remaining"] == "0"
+
+    redis_checks, local_checks = checks("redis"), checks("local")
+    with pytest.raises(HTTPException) as error:
+        await limiter.check("test", user, request)
+    assert error.value.status_code == 429
+    assert error.value.headers["Retry-After"] == "60"
+    # локальна копія bucket вже порожня - Redis не питаємо
+    assert checks("redis") == redis_checks
+    assert checks("local") == local_checks + 1
+
+
+async def test_fallback_to_local_bucket_without_redis(monkeypatch):
+    server = FakeServer()
+    server.connected = False
+    init_redis(FakeAsyncRedis(server=server))
+    try:
+        limiter = RateLimiter()
+        monkeypatch.setattr(limiter, "quota", lambda route, user: Quota(2, 60))
+        user = User(id=1, email="alice@example.com")
+        fallbacks = checks("fallback")
+
+        results = [await limiter.hit("test", user) for _ in range(3)]
+    finally:
+        await close_redis()
+
+    assert [result.allowed for result in results] == [True, True, False]
+    assert checks("fallback") == fallbacks + 2
@@ -0,0 +1,76 @@
+import json
+from datetime import date, datetime
+
+import pytest
+from starlette.requests import Request
+
+from src.database.models import Contact, User
+from src.repository import contacts as rep_contacts
+from src.routes import contact as contact_routes
+
+USER = User(
+    id=1, username="alice", email="alice@example.com", password="hash",
+    confirmed=True, created_at=datetime(2024, 1, 1)
+)
+
+
+def make_request(if_none_match: str = None) -> Request:
+    headers = [] if if_none_match is None else [(b"if-none-match", if_none_match.encode())]
+    return Request({
+        "type": "http", "method": "GET", "path": "/api/contacts/1",
+        "query_string": b"", "headers": headers
+    })
+
+
+@pytest.fixture
+def contacts(monkeypatch):
+    """
+    контакти в пам'яті замість бази; reads - кількість читань з "бази"
+    """
+    store = {1: Contact(
+        id=1, first_name="Ann", last_name="Lee", email="ann@example.com",
+        phone_number="123", birthday=date(1990, 5, 1), birthday_doy=121,
+        additional_info=None, created_at=datetime(2024, 1, 1), user_id=USER.id
+    )}
+    reads = []
+
+    async def get_contact(contact_id, user, db):
+        reads.append(contact_id)
+        return store.get(contact_id)
+
+    monkeypatch.setattr(rep_contacts, "get_contact", get_contact)
+    return store, reads
+
+
+async def read_contact(if_none_match: str = None):
+    return await contact_routes.read_contact(make_request(if_none_match), 1, user=USER, db=None)
+
+
+async def test_etag_returns_not_modified(fake_redis, contacts):
+    _, reads = contacts
+    first = await read_contact()
+    etag = first.headers["etag"]
+
+    repeated = await read_contact(etag)
+
+    assert first.status_code == 200
+    assert repeated.status_code == 304
+    assert repeated.headers["etag"] == etag
+    assert repeated.body == b""
+    # 304 віддається без читання контакту
+    assert reads == [1]
+
+
+async def test_write_changes_etag(fake_redis, contacts):
+    store, _ = contacts
+    etag = (await read_contact()).headers["etag"]
+    version = await fake_redis.get("contacts-version:1")
+
+    store[1].first_name = "Anna"
+    await rep_contacts._contacts_changed(USER.id, changed=[store[1]])
+
+    assert await fake_redis.get("contacts-version:1") != version
+    response = await read_contact(etag)
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert json.loads(response.body)["first_name"] == "Anna"
@@ -0,0 +1,122 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.configuration.config import settings
+from src.database import routing
+from src.database.db import RoutingSession
+from src.database.models import User
+from src.repository import contacts as rep_contacts
+from tests.conftest import create_sqlite_engine
+
+
+async def add_user(engine, email: str) -> None:
+    async with async_sessionmaker(engine)() as db:
+        db.add(User(username=email.split("@")[0], email=email, password="hash"))
+        await db.commit()
+
+
+@pytest.fixture
+async def router(tmp_path, sqlite_engine, fake_redis, monkeypatch):
+    # в кожній базі свій користувач - видно, куди пішов запит
+    await add_user(sqlite_engine, "primary@example.com")
+    for name in ("replica0", "replica1"):
+        engine = await create_sqlite_engine(tmp_path / f"{name}.db")
+        await add_user(engine, f"{name}@example.com")
+        await engine.dispose()
+    router = routing.ReplicaRouter([f"sqlite:///{tmp_path}/replica{index}.db" for index in range(2)])
+    monkeypatch.setattr(routing, "replica_router", router)
+    yield router
+    await router.dispose()
+
+
+@pytest.fixture
+def session_factory(sqlite_engine):
+    return async_sessionmaker(
+        sqlite_engine, class_=AsyncSession, sync_session_class=RoutingSession, expire_on_commit=False
+    )
+
+
+async def read_email(db: AsyncSession) -> str:
+    return (await db.execute(select(User.email))).scalars().first()
+
+
+async def test_reads_are_spread_over_replicas(router, session_factory):
+    user = User(id=1)
+    async with session_factory() as db:
+        emails = []
+        for _ in range(2):
+            async with routing.read_replica(db, user):
+                emails.append(await read_email(db))
+        # поза блоком - primary
+        emails.append(await read_email(db))
+    assert emails == ["replica0@example.com", "replica1@example.com", "primary@example.com"]
+
+
+async def test_reads_after_write_go_to_primary(router, session_factory):
+    user = User(id=1)
+    await router.mark_write(user.id)
+    # інший воркер бачить позначку лише через Redis
+    router.recent_writers.clear()
+    async with session_factory() as db:
+        async with routing.read_replica(db, user):
+            assert await read_email(db) == "primary@example.com"
+
+    async with session_factory() as db:
+        async with routing.read_replica(db, User(id=2)):
+            assert await read_email(db) != "primary@example.com"
+
+
+async def test_flush_goes_to_primary(router, session_factory, sqlite_engine):
+    async with session_factory() as db:
+        async with routing.read_replica(db, User(id=1)):
+            db.add(User(username="new", email="new@example.com", password="hash"))
+            await db.flush()
+        await db.commit()
+
+    async with async_sessionmaker(sqlite_engine)() as db:
+        emails = (await db.execute(select(User.email))).scalars().all()
+    assert "new@example.com" in emails
+
+
+async def test_unavailable_replica_is_skipped(router, session_factory, tmp_path):
+    (tmp_path / "replica1.db").unlink()
+    (tmp_path / "replica1.db").mkdir()
+    await router.check_health()
+    assert router.healthy == [True, False]
+
+    async with session_factory() as db:
+        for _ in range(3):
+            async with routing.read_replica(db, User(id=1)):
+                assert await read_email(db) == "replica0@example.com"
+
+
+async def test_health_check_times_out_on_connect(router, monkeypatch):
+    class HangingEngine:
+        @asynccontextmanager
+        async def connect(self):
+            await asyncio.sleep(3600)
+            yield
+
+    monkeypatch.setattr(settings, "db_replica_health_timeout", 0.05)
+    assert await asyncio.wait_for(router._check(HangingEngine()), 1) is False
+
+
+async def test_birthday_calendar_is_rebuilt_from_primary(router, session_factory, monkeypatch):
+    rebuilt_on = []
+
+    async def upcoming(user_id, segments, skip, limit, after):
+        return [] if rebuilt_on else None
+
+    async def rebuild(user_id, db):
+        rebuilt_on.append(db.info.get("read_engine"))
+        return True
+
+    monkeypatch.setattr(rep_contacts.birthday_calendar, "upcoming", upcoming)
+    monkeypatch.setattr(rep_contacts.birthday_calendar, "rebuild", rebuild)
+    async with session_factory() as db:
+        assert await rep_contacts.upcoming_birthdays(7, 0, 10, User(id=1), db) == []
+    assert rebuilt_on == [None]
@@ -0,0 +1,33 @@
+import pytest
+from pydantic import ValidationError
+
+from src.schemas.schemas import ContactBatchOperationSchema
+
+CONTACT = {
+    "first_name": "Ada",
+    "last_name": "Lovelace",
+    "email": "ada@example.com",
+    "phone_number": "123",
+    "birthday": "1815-12-10",
+    "additional_info": None,
+}
+
+
+@pytest.mark.parametrize("operation", [
+    {"op": "create", "data": CONTACT},
+    {"op": "update", "id": 1, "data": CONTACT},
+    {"op": "delete", "id": 1},
+])
+def test_valid_batch_operations(operation):
+    ContactBatchOperationSchema.model_validate(operation)
+
+
+@pytest.mark.parametrize("operation, message", [
+    ({"op": "create", "id": 1, "data": CONTACT}, "id is not allowed for create"),
+    ({"op": "update", "data": CONTACT}, "id is required for update"),
+    ({"op": "delete"}, "id is required for delete"),
+    ({"op": "update", "id": 1}, "data is required for update"),
+])
+def test_invalid_batch_operations(operation, message):
+    with pytest.raises(ValidationError, match=message):
+        ContactBatchOperationSchema.model_validate(operation)
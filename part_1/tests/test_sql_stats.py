@@ -0,0 +1,60 @@
+import asyncio
+import logging
+
+from starlette.responses import Response, StreamingResponse
+
+from src.services.sql_stats import SQLStatsMiddleware, current_stats
+
+
+def record_query(duration: float) -> None:
+    stats = current_stats()
+    stats.queries += 1
+    stats.duration += duration
+
+
+async def call(app) -> list:
+    messages = []
+    requests = [{"type": "http.request", "body": b"", "more_body": False}]
+
+    async def receive():
+        if requests:
+            return requests.pop()
+        # StreamingResponse чекає на розрив з'єднання, поки віддає тіло
+        await asyncio.Event().wait()
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": "/test", "headers": []}
+    await SQLStatsMiddleware(app)(scope, receive, send)
+    return messages
+
+
+def server_timing(messages) -> list:
+    start = next(message for message in messages if message["type"] == "http.response.start")
+    return [value for name, value in start["headers"] if name == b"server-timing"]
+
+
+async def test_server_timing_header():
+    async def app(scope, receive, send):
+        record_query(0.002)
+        await Response(b"{}", media_type="application/json")(scope, receive, send)
+
+    assert server_timing(await call(app)) == [b'db;dur=2.0;desc="1 queries"']
+
+
+async def test_streaming_response_logs_totals_instead_of_header(caplog):
+    async def rows():
+        # запити під час відправки тіла, вже після заголовків
+        for _ in range(3):
+            record_query(0.001)
+            yield b"row\n"
+
+    async def app(scope, receive, send):
+        await StreamingResponse(rows())(scope, receive, send)
+
+    with caplog.at_level(logging.INFO, logger="src.services.sql_stats"):
+        messages = await call(app)
+
+    assert server_timing(messages) == []
+    assert "GET /test: 3 queries" in caplog.text
@@ -0,0 +1,85 @@
+import asyncio
+from datetime import datetime
+
+from src.database.models import User
+from src.services import auth as auth_module
+from src.services import user_cache as user_cache_module
+from src.services.auth import auth_service
+from src.services.user_cache import UserCache
+
+
+def make_user(**fields) -> User:
+    return User(
+        id=1, username="alice", email="alice@example.com", password="hash",
+        confirmed=True, created_at=datetime(2024, 1, 1), **fields
+    )
+
+
+async def wait_for(condition) -> None:
+    for _ in range(200):
+        if await condition():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("condition is not met")
+
+
+async def test_refresh_invalidates_other_worker(fake_redis):
+    # два воркери з одним Redis
+    first, second = UserCache(), UserCache()
+    await second.set(make_user())
+    listener = asyncio.create_task(second.listen())
+    try:
+        async def subscribed():
+            return dict(await fake_redis.pubsub_numsub(UserCache.CHANNEL))[UserCache.CHANNEL.encode()] > 0
+
+        await wait_for(subscribed)
+        # listen очищує локальний рівень при підписці - кладемо копію знову
+        second.local.set("alice@example.com", {"stale": True})
+
+        await first.refresh(make_user(avatar="new.jpg"))
+
+        async def dropped():
+            return second.local.get("alice@example.com") is None
+
+        await wait_for(dropped)
+        assert (await second.get("alice@example.com")).avatar == "new.jpg"
+    finally:
+        listener.cancel()
+        await asyncio.gather(listener, return_exceptions=True)
+
+
+def test_instance_id_is_per_process(monkeypatch):
+    cache = UserCache()
+    parent_id = cache.instance_id
+    assert cache.instance_id == parent_id
+
+    # воркер, форкнутий з master після імпорту модуля
+    monkeypatch.setattr(user_cache_module.os, "getpid", lambda: -1)
+    assert cache.instance_id != parent_id
+
+
+async def test_fill_after_miss_does_not_overwrite_refresh(fake_redis, monkeypatch):
+    cache = UserCache()
+    monkeypatch.setattr(auth_module, "user_cache", cache)
+    stale = make_user()
+
+    async def read_during_refresh(email, db):
+        # запит зміни аватару завершується між читанням з бази та записом у кеш
+        await cache.refresh(make_user(avatar="new.jpg"))
+        cache.local.clear()
+        return stale
+
+    monkeypatch.setattr(auth_module.rep_users, "get_user_by_email", read_during_refresh)
+    token = await auth_service.create_access_token({"sub": "alice@example.com"})
+
+    user = await auth_service.get_current_user(token, None)
+    assert user is stale
+    assert (await cache.get("alice@example.com")).avatar == "new.jpg"
+
+
+async def test_fill_after_miss_stores_user(fake_redis):
+    cache = UserCache()
+    await cache.set(make_user(), overwrite=False)
+    cache.local.clear()
+
+    assert (await cache.get("alice@example.com")).id == 1